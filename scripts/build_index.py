@@ -12,12 +12,23 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Build tref FAISS indexes from KB markdown files")
     parser.add_argument("kb_path", type=Path, help="Path to kb root")
     parser.add_argument("--output", type=Path, required=True, help="Output index root")
+    parser.add_argument("--incremental", action="store_true", help="Only re-embed changed documents")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for KB parsing")
+    parser.add_argument("--merged", action="store_true", help="Also write one merged index over all libraries")
+    parser.add_argument("--index-type", choices=["flat", "hnsw", "ivfpq"], default="flat", help="FAISS index type")
     args = parser.parse_args()
 
-    check = validate_kb(args.kb_path)
+    check = validate_kb(args.kb_path, jobs=args.jobs)
     if not check["valid"]:
         raise SystemExit(json.dumps(check, indent=2))
-    summary = build_indexes(kb_root=args.kb_path, output_root=args.output)
+    summary = build_indexes(
+        kb_root=args.kb_path,
+        output_root=args.output,
+        index_type=args.index_type,
+        incremental=args.incremental,
+        jobs=args.jobs,
+        merged=args.merged,
+    )
     print(json.dumps(summary, indent=2))
 
 
@@ -58,6 +58,7 @@ run_cmd query_explicit_json ". .venv/bin/activate && python -m tref --index-root
 run_cmd query_autodetect ". .venv/bin/activate && python -m tref --index-root /tmp/tref-indexes-eval --freshness-policy offline-only 'how to rebase current branch safely'"
 run_cmd query_no_autodetect_expected_fail ". .venv/bin/activate && python -m tref --index-root /tmp/tref-indexes-eval --freshness-policy offline-only --no-autodetect 'how to rebase current branch safely'"
 run_cmd query_command_form ". .venv/bin/activate && python -m tref query --index-root /tmp/tref-indexes-eval --freshness-policy offline-only --json pandas@2.2 'groupby multiple columns agg mean'"
+run_cmd startup_bench ". .venv/bin/activate && python scripts/startup_bench.py --runs 5 --output $OUT_DIR/startup.json"
 run_cmd bench ". .venv/bin/activate && python -m tref bench --index-root /tmp/tref-indexes-eval 'groupby multiple columns agg mean' --library pandas --version 2.2 --runs 25"
 run_cmd api_python ". .venv/bin/activate && python - << 'PY'
 from pathlib import Path
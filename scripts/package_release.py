@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+
+from tref.updater import write_release_artifacts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write tref release assets (full archive and per-library artifacts)")
+    parser.add_argument("index_root", type=Path, help="Built index root (output of build_index.py)")
+    parser.add_argument("--output", type=Path, required=True, help="Directory to write release assets into")
+    args = parser.parse_args()
+
+    summary = write_release_artifacts(args.index_root, args.output)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
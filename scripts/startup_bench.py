@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Non-query subcommands must not pay for native ML/vector libraries at startup.
+DEFAULT_COMMANDS = ["--help", "config show", "remote show", "status"]
+HEAVY_MODULES = {"faiss", "fastembed", "numpy", "onnxruntime", "tokenizers"}
+
+
+def _parse_importtime(stderr: str) -> tuple[float, list[tuple[str, float]], set[str]]:
+    """Return (total import ms, slowest top-level imports, heavy modules seen) from -X importtime output."""
+    total_us = 0
+    top_level: list[tuple[str, float]] = []
+    seen: set[str] = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _self, cumulative_us, name = line.split("|", 2)
+        root = name.strip().split(".", 1)[0]
+        if root in HEAVY_MODULES:
+            seen.add(root)
+        # Top-level imports have exactly one space after the separator; nested ones are indented.
+        if name.startswith(" ") and not name.startswith("  "):
+            total_us += int(cumulative_us)
+            top_level.append((name.strip(), int(cumulative_us) / 1000))
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return total_us / 1000, top_level, seen
+
+
+def _bench_command(command: str, runs: int) -> dict:
+    argv = [sys.executable, "-X", "importtime", "-m", "tref", *command.split()]
+    wall_ms: list[float] = []
+    import_ms: list[float] = []
+    slowest: list[tuple[str, float]] = []
+    heavy: set[str] = set()
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.run(argv, capture_output=True, text=True)
+        wall_ms.append((time.perf_counter() - start) * 1000)
+        total, slowest, seen = _parse_importtime(proc.stderr)
+        import_ms.append(total)
+        heavy |= seen
+    return {
+        "command": f"tref {command}",
+        "wall_p50_ms": round(statistics.median(wall_ms), 1),
+        "wall_min_ms": round(min(wall_ms), 1),
+        "import_p50_ms": round(statistics.median(import_ms), 1),
+        "slowest_imports_ms": [[name, round(ms, 1)] for name, ms in slowest[:8]],
+        "heavy_modules": sorted(heavy),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Startup-time regression benchmark for non-query tref commands")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (median is reported)")
+    parser.add_argument("--command", action="append", help="Subcommand to time, e.g. 'config show' (repeatable)")
+    parser.add_argument("--max-import-ms", type=float, default=None, help="Fail if median import time exceeds this")
+    parser.add_argument("--output", default=None, help="Optional path to write the JSON report")
+    args = parser.parse_args()
+
+    results = [_bench_command(command, max(1, args.runs)) for command in (args.command or DEFAULT_COMMANDS)]
+    failures: list[str] = []
+    for result in results:
+        if result["heavy_modules"]:
+            failures.append(f"{result['command']} imported {result['heavy_modules']}")
+        if args.max_import_ms is not None and result["import_p50_ms"] > args.max_import_ms:
+            failures.append(f"{result['command']} import time {result['import_p50_ms']}ms > {args.max_import_ms}ms")
+
+    report = {"python": sys.version.split()[0], "runs": args.runs, "results": results, "failures": failures}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
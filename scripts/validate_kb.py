@@ -12,9 +12,10 @@ from tref.indexer import validate_kb
 def main() -> None:
     parser = argparse.ArgumentParser(description="Validate tref KB markdown schema")
     parser.add_argument("kb_path", type=Path, help="Path to KB root")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="Worker processes for parsing")
     args = parser.parse_args()
 
-    result = validate_kb(args.kb_path)
+    result = validate_kb(args.kb_path, jobs=args.jobs)
     print(json.dumps(result, indent=2))
     if not result["valid"]:
         sys.exit(1)
@@ -1,4 +1,15 @@
-from tref.api import ask
+from __future__ import annotations
 
-__all__ = ["ask"]
+from typing import Any
+
+__all__ = ["ask", "ask_many"]
 __version__ = "0.3.0"
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved lazily so `tref.cli` can reach a running daemon without importing faiss/fastembed.
+    if name in __all__:
+        from tref import api
+
+        return getattr(api, name)
+    raise AttributeError(f"module 'tref' has no attribute '{name}'")
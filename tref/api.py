@@ -1,15 +1,29 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any
 
-import httpx
-
-from tref.config import DEFAULT_FRESHNESS_POLICY, DEFAULT_TOP_K, INDEX_ROOT, OLLAMA_URL
+from tref.config import (
+    DEFAULT_FRESHNESS_POLICY,
+    DEFAULT_TOP_K,
+    INDEX_ROOT,
+    OLLAMA_URL,
+    RESPONSE_CACHE,
+    SKIP_FRESHNESS_OFFLINE,
+)
 from tref.errors import DetectionError
-from tref.kb import detect_library_from_query, resolve_version_with_reason, split_inline_library_version
+from tref.kb import (
+    detect_library_from_query,
+    parse_library_version,
+    resolve_version_with_reason,
+    split_inline_library_version,
+)
 from tref.models import AskResponse
 from tref.retrieval import Retriever, infer_query_intent
+from tref.routing import LibraryRouter
+from tref.timing import stage
 from tref.updater import ensure_index_exists, freshness_status
 
 RISK_TERMS = {
@@ -26,6 +40,10 @@ RISK_TERMS = {
 }
 EXAMPLE_TERMS = {"example", "examples", "sample", "demo", "how to", "show"}
 OVERVIEW_TERMS = {"overview", "full doc", "documentation", "all options", "all ways", "complete"}
+FEDERATED_MAX_WORKERS = 8
+# Hits fetched per index for a federated query, so each index's score distribution is estimated
+# from more than the handful of hits that end up in the merged top-k.
+FEDERATED_SCORE_SAMPLE = 20
 
 
 def _query_flags(query: str) -> dict[str, bool]:
@@ -454,6 +472,8 @@ def _ollama_answer(query: str, contexts: list[dict[str, Any]], model: str) -> st
         f"Context:\n{context_blob}\n\n"
         "Answer with concise, technical guidance and cite source numbers like [1], [2]."
     )
+    import httpx
+
     payload = {"model": model, "prompt": prompt, "stream": False}
     response = httpx.post(OLLAMA_URL, json=payload, timeout=60.0)
     response.raise_for_status()
@@ -461,25 +481,37 @@ def _ollama_answer(query: str, contexts: list[dict[str, Any]], model: str) -> st
     return str(data.get("response", "")).strip()
 
 
-def ask(
+@dataclass(slots=True)
+class _QueryPlan:
+    query: str
+    library: str
+    requested_version: str | None
+    version_resolution_reason: str
+    index_dir: Path
+    policy: str
+    autodetected: bool
+    warnings: list[str]
+
+
+def _route_library(query: str, base_dir: Path) -> tuple[str | None, list[dict[str, Any]]]:
+    router = LibraryRouter.load(base_dir)
+    if not router:
+        return None, []
+    return router.route(Retriever.query_vector(query))
+
+
+def _plan_query(
     query: str,
-    library: str | None = None,
-    version: str | None = None,
-    top_k: int = DEFAULT_TOP_K,
-    json_mode: bool = False,
-    llm: bool = False,
-    llm_model: str = "llama3.1:8b-instruct",
-    strict_fresh: bool = False,
-    freshness_policy: str = DEFAULT_FRESHNESS_POLICY,
-    no_autodetect: bool = False,
-    include_full_doc: bool = False,
-    preferred_language: str | None = None,
-    index_root: Path | None = None,
-) -> dict[str, Any] | AskResponse:
+    library: str | None,
+    version: str | None,
+    strict_fresh: bool,
+    freshness_policy: str,
+    no_autodetect: bool,
+    base_dir: Path,
+) -> _QueryPlan:
     clean_query = query.strip()
     if not clean_query:
         raise ValueError("query must not be empty")
-    base_dir = index_root.expanduser().resolve() if index_root else INDEX_ROOT
 
     parsed_library, parsed_version, stripped_query = split_inline_library_version(clean_query)
     requested_version = version
@@ -498,17 +530,24 @@ def ask(
         raise DetectionError("DETECT_DISABLED", "Library must be provided when --no-autodetect is enabled")
 
     if not library:
-        guessed_library, candidates = detect_library_from_query(clean_query, index_root=base_dir)
-        if not guessed_library:
-            raise DetectionError(
-                "DETECT_AMBIGUOUS",
-                f"Library could not be auto-detected confidently. Top candidates: {candidates}",
-            )
+        with stage("detect_library"):
+            guessed_library, candidates = detect_library_from_query(clean_query, index_root=base_dir)
+        if guessed_library:
+            warnings.append(f"Library auto-detected as '{guessed_library}'.")
+        else:
+            # Lexical detection was not confident: route on the query embedding, which the search reuses.
+            with stage("route_library"):
+                guessed_library, routed = _route_library(clean_query, base_dir)
+            if not guessed_library:
+                raise DetectionError(
+                    "DETECT_AMBIGUOUS",
+                    "Library could not be auto-detected confidently. "
+                    f"Top candidates: {candidates}; semantic candidates: {routed}",
+                )
+            warnings.append(f"Library auto-detected as '{guessed_library}' (semantic routing).")
         library = guessed_library
         autodetected = True
-        warnings.append(f"Library auto-detected as '{library}'.")
 
-    freshness = freshness_status()
     policy = freshness_policy.lower().strip()
     if policy not in {"strict", "warn", "offline-only"}:
         raise ValueError("freshness_policy must be one of: strict, warn, offline-only")
@@ -523,34 +562,53 @@ def ask(
         ensure_fresh = True
         strict_fresh_effective = strict_fresh
 
-    resolved_version, version_resolution_reason = resolve_version_with_reason(
-        library,
-        version,
-        index_root=base_dir,
-        allow_remote=(policy != "offline-only"),
-    )
-    index_dir = ensure_index_exists(
-        library,
-        resolved_version,
-        index_root=base_dir,
-        ensure_fresh=ensure_fresh,
-        strict_fresh=strict_fresh_effective,
+    with stage("resolve_version"):
+        resolved_version, version_resolution_reason = resolve_version_with_reason(
+            library,
+            version,
+            index_root=base_dir,
+            allow_remote=(policy != "offline-only"),
+        )
+    with stage("ensure_index"):
+        index_dir = ensure_index_exists(
+            library,
+            resolved_version,
+            index_root=base_dir,
+            ensure_fresh=ensure_fresh,
+            strict_fresh=strict_fresh_effective,
+        )
+    return _QueryPlan(
+        query=clean_query,
+        library=library,
+        requested_version=requested_version,
+        version_resolution_reason=version_resolution_reason,
+        index_dir=index_dir,
+        policy=policy,
+        autodetected=autodetected,
+        warnings=warnings,
     )
 
-    effective_version = index_dir.name
-    retriever = Retriever.get(index_dir=index_dir)
-    query_intent = infer_query_intent(clean_query)
-    hits = retriever.search(clean_query, top_k=top_k, intent=query_intent)
-    freshness = freshness_status()
-
-    if not freshness.get("fresh", False):
-        warnings.append("Index freshness check failed or is stale. Run `tref update`.")
-    if freshness.get("verified") is False:
-        warnings.append("Index checksum verification is missing/failed for current local snapshot.")
-    if freshness.get("require_signature") and (freshness.get("verified_signature") is not True):
-        warnings.append("Signature verification is required but missing/failed for current local snapshot.")
-    if freshness.get("trusted") is False:
-        warnings.append("Index snapshot is not fully trusted under current trust policy.")
+
+def _response_freshness(plan: _QueryPlan) -> dict[str, Any]:
+    if plan.policy == "offline-only" and SKIP_FRESHNESS_OFFLINE:
+        return {"skipped": True, "reason": "offline-only"}
+    with stage("freshness_status"):
+        return freshness_status()
+
+
+def _response_warnings(plan: _QueryPlan, freshness: dict[str, Any], effective_version: str) -> tuple[list[str], bool]:
+    requested_version = plan.requested_version
+    version_resolution_reason = plan.version_resolution_reason
+    warnings = list(plan.warnings)
+    if not freshness.get("skipped"):
+        if not freshness.get("fresh", False):
+            warnings.append("Index freshness check failed or is stale. Run `tref update`.")
+        if freshness.get("verified") is False:
+            warnings.append("Index checksum verification is missing/failed for current local snapshot.")
+        if freshness.get("require_signature") and (freshness.get("verified_signature") is not True):
+            warnings.append("Signature verification is required but missing/failed for current local snapshot.")
+        if freshness.get("trusted") is False:
+            warnings.append("Index snapshot is not fully trusted under current trust policy.")
     version_mismatch = bool(requested_version) and (effective_version != requested_version)
     if version_mismatch:
         if version_resolution_reason.startswith("compatible-"):
@@ -559,6 +617,27 @@ def ask(
             )
         else:
             warnings.append(f"Requested version '{requested_version}' not found; using '{effective_version}'.")
+    return warnings, version_mismatch
+
+
+def _build_response(
+    plan: _QueryPlan,
+    retriever: Retriever,
+    hits: list,
+    query_intent: str,
+    json_mode: bool,
+    llm: bool,
+    llm_model: str,
+    include_full_doc: bool,
+    preferred_language: str | None,
+) -> dict[str, Any] | AskResponse:
+    clean_query = plan.query
+    requested_version = plan.requested_version
+    version_resolution_reason = plan.version_resolution_reason
+    index_dir = plan.index_dir
+    effective_version = index_dir.name
+    freshness = _response_freshness(plan)
+    warnings, version_mismatch = _response_warnings(plan, freshness, effective_version)
 
     provenance = {
         "index_dir": str(index_dir),
@@ -566,20 +645,22 @@ def ask(
         "kb_commit": retriever.index_meta.get("kb_commit"),
         "build_hash": retriever.index_meta.get("build_hash"),
         "builder_version": retriever.index_meta.get("builder_version"),
-        "freshness_policy": policy,
+        "freshness_policy": plan.policy,
         "query_intent": query_intent,
     }
 
-    guidance = _build_guidance(clean_query, hits)
+    with stage("build_guidance"):
+        guidance = _build_guidance(clean_query, hits)
     sections: list[dict[str, Any]] = []
     top_item: str | None = None
-    if hits:
-        top_item = guidance.get("command_or_function") or hits[0].item
-        sections = retriever.item_document(top_item)
-        guidance = _augment_guidance_from_sections(guidance, sections)
-        guidance = _extract_structured_fields_from_sections(guidance, sections)
-        guidance = _apply_structured_alternatives(guidance, retriever.item_metadata(top_item))
-    guidance = _prefer_examples_by_language(guidance, preferred_language)
+    with stage("section_augment"):
+        if hits:
+            top_item = guidance.get("command_or_function") or hits[0].item
+            sections = retriever.item_document(top_item)
+            guidance = _augment_guidance_from_sections(guidance, sections)
+            guidance = _extract_structured_fields_from_sections(guidance, sections)
+            guidance = _apply_structured_alternatives(guidance, retriever.item_metadata(top_item))
+        guidance = _prefer_examples_by_language(guidance, preferred_language)
     full_document = None
     query_flags = _query_flags(clean_query)
     if hits and (include_full_doc or query_flags["overview_focus"]):
@@ -593,7 +674,7 @@ def ask(
         }
 
     response = AskResponse(
-        library=library,
+        library=plan.library,
         version=effective_version,
         version_requested=requested_version,
         version_resolution={
@@ -604,7 +685,7 @@ def ask(
         version_mismatch=version_mismatch,
         query=clean_query,
         results=hits,
-        autodetected_library=autodetected,
+        autodetected_library=plan.autodetected,
         freshness=freshness,
         provenance=provenance,
         guidance=guidance,
@@ -613,8 +694,280 @@ def ask(
     )
 
     if llm:
-        response.answer = _ollama_answer(clean_query, [r.to_dict() for r in hits], llm_model)
+        with stage("llm"):
+            response.answer = _ollama_answer(clean_query, [r.to_dict() for r in hits], llm_model)
 
     if json_mode:
-        return response.to_dict()
+        with stage("serialize"):
+            return response.to_dict()
     return response
+
+
+def _response_cache_key(
+    plan: _QueryPlan, top_k: int, include_full_doc: bool, preferred_language: str | None
+) -> tuple[str, str] | None:
+    from tref.responsecache import index_build_hash, response_key
+
+    build_hash = index_build_hash(plan.index_dir)
+    if not build_hash:
+        return None
+    params = {"top_k": top_k, "include_full_doc": include_full_doc, "preferred_language": preferred_language}
+    return response_key(build_hash, plan.index_dir, plan.query, params), build_hash
+
+
+def _cached_response(plan: _QueryPlan, payload: dict[str, Any], json_mode: bool) -> dict[str, Any] | AskResponse:
+    """Re-attach the per-request parts (plan, freshness, warnings) to a cached response body."""
+    effective_version = plan.index_dir.name
+    freshness = _response_freshness(plan)
+    warnings, version_mismatch = _response_warnings(plan, freshness, effective_version)
+    payload.update(
+        {
+            "library": plan.library,
+            "version": effective_version,
+            "version_requested": plan.requested_version,
+            "version_resolution": {
+                "requested": plan.requested_version,
+                "resolved": effective_version,
+                "reason": plan.version_resolution_reason,
+            },
+            "version_mismatch": version_mismatch,
+            "query": plan.query,
+            "autodetected_library": plan.autodetected,
+            "freshness": freshness,
+            "warnings": warnings,
+        }
+    )
+    payload["provenance"]["freshness_policy"] = plan.policy
+    if json_mode:
+        return payload
+    return AskResponse.from_dict(payload)
+
+
+def ask(
+    query: str,
+    library: str | None = None,
+    version: str | None = None,
+    top_k: int = DEFAULT_TOP_K,
+    json_mode: bool = False,
+    llm: bool = False,
+    llm_model: str = "llama3.1:8b-instruct",
+    strict_fresh: bool = False,
+    freshness_policy: str = DEFAULT_FRESHNESS_POLICY,
+    no_autodetect: bool = False,
+    include_full_doc: bool = False,
+    preferred_language: str | None = None,
+    index_root: Path | None = None,
+    libraries: list[str] | None = None,
+) -> dict[str, Any] | AskResponse:
+    base_dir = index_root.expanduser().resolve() if index_root else INDEX_ROOT
+    if libraries is None and library and "," in library:
+        libraries = library.split(",")
+    if libraries is not None:
+        return _ask_federated(
+            query,
+            libraries,
+            version,
+            top_k,
+            strict_fresh,
+            freshness_policy,
+            base_dir,
+            json_mode=json_mode,
+            llm=llm,
+            llm_model=llm_model,
+            include_full_doc=include_full_doc,
+            preferred_language=preferred_language,
+        )
+    plan = _plan_query(query, library, version, strict_fresh, freshness_policy, no_autodetect, base_dir)
+    # LLM answers are not deterministic, so only retrieval-only responses are cached.
+    cache_key = None
+    if RESPONSE_CACHE and not llm:
+        from tref.responsecache import ResponseCache
+
+        with stage("response_cache"):
+            cache_key = _response_cache_key(plan, top_k, include_full_doc, preferred_language)
+            cached = ResponseCache.shared().get(cache_key[0]) if cache_key else None
+        if cached is not None:
+            return _cached_response(plan, cached, json_mode)
+    with stage("load_retriever"):
+        retriever = Retriever.get(index_dir=plan.index_dir)
+    query_intent = infer_query_intent(plan.query)
+    hits = retriever.search(plan.query, top_k=top_k, intent=query_intent)
+    response = _build_response(
+        plan,
+        retriever,
+        hits,
+        query_intent,
+        json_mode=json_mode,
+        llm=llm,
+        llm_model=llm_model,
+        include_full_doc=include_full_doc,
+        preferred_language=preferred_language,
+    )
+    if cache_key:
+        from tref.responsecache import ResponseCache
+
+        key, build_hash = cache_key
+        ResponseCache.shared().put(key, response if json_mode else response.to_dict(), build_hash=build_hash)
+    return response
+
+
+def _standardized_scores(hits: list) -> list[float]:
+    """Z-scores of `hits` within their own index; an index whose hits all tie scores 0."""
+    if not hits:
+        return []
+    scores = [float(hit.score) for hit in hits]
+    mean = sum(scores) / len(scores)
+    spread = (sum((score - mean) ** 2 for score in scores) / len(scores)) ** 0.5
+    if spread <= 1e-12:
+        return [0.0] * len(scores)
+    return [(score - mean) / spread for score in scores]
+
+
+def _ask_federated(
+    query: str,
+    libraries: list[str],
+    version: str | None,
+    top_k: int,
+    strict_fresh: bool,
+    freshness_policy: str,
+    base_dir: Path,
+    json_mode: bool,
+    llm: bool,
+    llm_model: str,
+    include_full_doc: bool,
+    preferred_language: str | None,
+) -> dict[str, Any] | AskResponse:
+    """Search several library indexes for one query and merge their hits into a single top-k."""
+    targets: list[tuple[str, str | None]] = []
+    for entry in libraries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        parsed_library, parsed_version = parse_library_version(entry)
+        targets.append((parsed_library, parsed_version) if parsed_library else (entry, None))
+    if not targets:
+        raise ValueError("libraries must name at least one library")
+    if version and len(targets) > 1:
+        raise ValueError("version applies to a single library; use LIB@VER entries for a federated query")
+
+    plans: list[_QueryPlan] = []
+    for target_library, target_version in targets:
+        plan = _plan_query(
+            query, target_library, target_version or version, strict_fresh, freshness_policy, True, base_dir
+        )
+        if all(plan.index_dir != seen.index_dir for seen in plans):
+            plans.append(plan)
+
+    clean_query = plans[0].query
+    query_intent = infer_query_intent(clean_query)
+    # Embed once up front; every retriever's search then hits the shared query-vector cache.
+    with stage("embed_query"):
+        Retriever.query_vector(clean_query)
+
+    def _search(plan: _QueryPlan) -> tuple[Retriever, list]:
+        retriever = Retriever.get(index_dir=plan.index_dir)
+        sample = max(top_k, FEDERATED_SCORE_SAMPLE)
+        return retriever, retriever.search(clean_query, top_k=sample, intent=query_intent)
+
+    with stage("federated_search"):
+        with ThreadPoolExecutor(max_workers=min(len(plans), FEDERATED_MAX_WORKERS)) as pool:
+            outcomes = list(pool.map(_search, plans))
+
+    # Raw hybrid scores depend on each index's BM25 statistics and size, so they are not comparable
+    # across indexes. Rank by how far a hit stands out within its own index instead; `hit.score`
+    # stays raw for display. Ties keep the order the libraries were given in.
+    candidates = [
+        (normalized, hit, pos)
+        for pos, (_retriever, hits) in enumerate(outcomes)
+        for normalized, hit in zip(_standardized_scores(hits), hits, strict=True)
+    ]
+    merged = [(hit, pos) for _normalized, hit, pos in sorted(candidates, key=lambda entry: -entry[0])[:top_k]]
+    lead = merged[0][1] if merged else 0
+    warnings = list(dict.fromkeys(warning for plan in plans for warning in plan.warnings))
+    lead_plan = replace(plans[lead], warnings=warnings)
+    response = _build_response(
+        lead_plan,
+        outcomes[lead][0],
+        [hit for hit, _pos in merged],
+        query_intent,
+        json_mode=False,
+        llm=llm,
+        llm_model=llm_model,
+        include_full_doc=include_full_doc,
+        preferred_language=preferred_language,
+    )
+    response.provenance["federated_scoring"] = "zscore"
+    response.provenance["federated"] = [
+        {
+            "library": plan.library,
+            "version": plan.index_dir.name,
+            "index_dir": str(plan.index_dir),
+            "build_hash": retriever.index_meta.get("build_hash"),
+            "hits": sum(1 for _hit, pos in merged if pos == i),
+        }
+        for i, (plan, (retriever, _hits)) in enumerate(zip(plans, outcomes, strict=True))
+    ]
+    if json_mode:
+        with stage("serialize"):
+            return response.to_dict()
+    return response
+
+
+def ask_many(
+    queries: list[str],
+    library: str | None = None,
+    version: str | None = None,
+    top_k: int = DEFAULT_TOP_K,
+    json_mode: bool = False,
+    llm: bool = False,
+    llm_model: str = "llama3.1:8b-instruct",
+    strict_fresh: bool = False,
+    freshness_policy: str = DEFAULT_FRESHNESS_POLICY,
+    no_autodetect: bool = False,
+    include_full_doc: bool = False,
+    preferred_language: str | None = None,
+    index_root: Path | None = None,
+) -> list[dict[str, Any] | AskResponse]:
+    """Answer a list of queries, batching embedding and FAISS search per resolved index.
+
+    Returns the same responses, in the same order, as calling `ask` once per query.
+    """
+    base_dir = index_root.expanduser().resolve() if index_root else INDEX_ROOT
+    plans = [
+        _plan_query(query, library, version, strict_fresh, freshness_policy, no_autodetect, base_dir)
+        for query in queries
+    ]
+
+    groups: dict[Path, list[int]] = {}
+    for pos, plan in enumerate(plans):
+        groups.setdefault(plan.index_dir, []).append(pos)
+
+    retrievers: dict[Path, Retriever] = {}
+    intents: list[str] = [infer_query_intent(plan.query) for plan in plans]
+    hits_by_pos: dict[int, list] = {}
+    for index_dir, positions in groups.items():
+        with stage("load_retriever"):
+            retriever = Retriever.get(index_dir=index_dir)
+        retrievers[index_dir] = retriever
+        batch_hits = retriever.search_many(
+            [plans[pos].query for pos in positions],
+            top_k=top_k,
+            intents=[intents[pos] for pos in positions],
+        )
+        for pos, hits in zip(positions, batch_hits, strict=True):
+            hits_by_pos[pos] = hits
+
+    return [
+        _build_response(
+            plan,
+            retrievers[plan.index_dir],
+            hits_by_pos[pos],
+            intents[pos],
+            json_mode=json_mode,
+            llm=llm,
+            llm_model=llm_model,
+            include_full_doc=include_full_doc,
+            preferred_language=preferred_language,
+        )
+        for pos, plan in enumerate(plans)
+    ]
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import bisect
+import json
+import mmap
+import re
+import struct
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from tref.errors import ValidationError
+
+CHUNK_STORE_FILE = "chunks.bin"
+CHUNK_STORE_MAGIC = b"TREFCOL1"
+CHUNK_STORE_FORMAT = 2
+TOKEN_RE = re.compile(r"[a-zA-Z0-9_.-]+")
+
+# Fields that are constant across every chunk of one source document. They are
+# stored once per document in the header and referenced by the `doc_id` column.
+DOC_FIELDS = (
+    "citation",
+    "library",
+    "version",
+    "type",
+    "signature",
+    "aliases",
+    "intent",
+    "alternatives",
+    "source_url",
+    "source_title",
+    "source_last_updated",
+)
+_PREFIX = struct.Struct("<8sQ")
+
+
+def chunk_order(chunk_id: str) -> int:
+    try:
+        return int(str(chunk_id).rsplit("::", 1)[-1])
+    except Exception:
+        return 0
+
+
+def chunk_query_text(chunk: dict[str, Any]) -> str:
+    alias_text = " ".join(chunk.get("aliases") or [])
+    intent_text = chunk.get("intent") or ""
+    return f"{chunk['item']} {chunk['signature']} {alias_text} {intent_text} {chunk['text']}"
+
+
+def _align8(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _doc_record(chunk: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "citation": chunk.get("citation"),
+        "library": chunk.get("library"),
+        "version": chunk.get("version"),
+        "type": chunk.get("type", ""),
+        "signature": chunk.get("signature"),
+        "aliases": list(chunk.get("aliases") or []),
+        "intent": chunk.get("intent", ""),
+        "alternatives": list(chunk.get("alternatives") or []),
+        "source_url": chunk.get("source_url"),
+        "source_title": chunk.get("source_title"),
+        "source_last_updated": chunk.get("source_last_updated"),
+    }
+
+
+def _string_column(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    if encoded:
+        offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return offsets, np.frombuffer(b"".join(encoded), dtype="u1")
+
+
+def encode_chunk_store(chunks: list[dict[str, Any]]) -> bytes:
+    docs: list[dict[str, Any]] = []
+    doc_ids: dict[str, int] = {}
+    items: list[dict[str, Any]] = []
+    item_ids: dict[str, int] = {}
+    doc_col: list[int] = []
+    item_col: list[int] = []
+    order_col: list[int] = []
+    texts: list[str] = []
+    sections: list[str] = []
+    section_ids: dict[str, int] = {}
+    section_col: list[int] = []
+    chunk_tokens: list[set[str]] = []
+
+    for chunk in chunks:
+        doc = _doc_record(chunk)
+        key = json.dumps(doc, sort_keys=True, ensure_ascii=False)
+        doc_id = doc_ids.get(key)
+        if doc_id is None:
+            doc_id = doc_ids[key] = len(docs)
+            docs.append(doc)
+        item = str(chunk["item"])
+        item_id = item_ids.get(item)
+        if item_id is None:
+            item_id = item_ids[item] = len(items)
+            items.append({"name": item, "doc": doc_id})
+        doc_col.append(doc_id)
+        item_col.append(item_id)
+        order_col.append(chunk_order(str(chunk.get("id", ""))))
+        texts.append(str(chunk["text"]))
+        section = str(chunk.get("section", ""))
+        section_id = section_ids.get(section)
+        if section_id is None:
+            section_id = section_ids[section] = len(sections)
+            sections.append(section)
+        section_col.append(section_id)
+        chunk_tokens.append(set(TOKEN_RE.findall(chunk_query_text(chunk).lower())))
+
+    # Per-item chunk lists (CSR), in file order then stably sorted by section order.
+    per_item: list[list[int]] = [[] for _ in items]
+    for idx, item_id in enumerate(item_col):
+        per_item[item_id].append(idx)
+    item_chunk_offsets = np.zeros(len(items) + 1, dtype="<i8")
+    flat: list[int] = []
+    for item_id, idxs in enumerate(per_item):
+        idxs.sort(key=lambda i: order_col[i])
+        flat.extend(idxs)
+        item_chunk_offsets[item_id + 1] = len(flat)
+
+    # Sparse chunk x token matrix (CSR) over a sorted vocabulary, for vectorized lexical overlap.
+    vocab = sorted(set().union(*chunk_tokens)) if chunk_tokens else []
+    vocab_ids = {token: i for i, token in enumerate(vocab)}
+    token_offsets = np.zeros(len(chunk_tokens) + 1, dtype="<i8")
+    token_ids: list[int] = []
+    for idx, tokens in enumerate(chunk_tokens):
+        token_ids.extend(sorted(vocab_ids[t] for t in tokens))
+        token_offsets[idx + 1] = len(token_ids)
+
+    text_offsets, text_blob = _string_column(texts)
+    vocab_offsets, vocab_blob = _string_column(vocab)
+    arrays: dict[str, np.ndarray] = {
+        "doc_id": np.asarray(doc_col, dtype="<i4"),
+        "item_id": np.asarray(item_col, dtype="<i4"),
+        "section_id": np.asarray(section_col, dtype="<i4"),
+        "order": np.asarray(order_col, dtype="<i4"),
+        "text.offsets": text_offsets,
+        "text.blob": text_blob,
+        "item_chunks.offsets": item_chunk_offsets,
+        "item_chunks.indices": np.asarray(flat, dtype="<i4"),
+        "tokens.offsets": token_offsets,
+        "tokens.ids": np.asarray(token_ids, dtype="<i4"),
+        "vocab.offsets": vocab_offsets,
+        "vocab.blob": vocab_blob,
+    }
+
+    segments: dict[str, list[Any]] = {}
+    cursor = 0
+    for name, arr in arrays.items():
+        segments[name] = [cursor, int(arr.size), arr.dtype.str]
+        cursor = _align8(cursor + arr.nbytes)
+
+    header = json.dumps(
+        {
+            "format": CHUNK_STORE_FORMAT,
+            "count": len(chunks),
+            "docs": docs,
+            "items": items,
+            "sections": sections,
+            "segments": segments,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    data_start = _align8(_PREFIX.size + len(header))
+
+    out = bytearray(data_start + cursor)
+    _PREFIX.pack_into(out, 0, CHUNK_STORE_MAGIC, len(header))
+    out[_PREFIX.size : _PREFIX.size + len(header)] = header
+    for name, arr in arrays.items():
+        start = data_start + segments[name][0]
+        out[start : start + arr.nbytes] = arr.tobytes()
+    return bytes(out)
+
+
+def write_chunk_store(chunks: list[dict[str, Any]], path: Path) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(encode_chunk_store(chunks))
+    tmp.replace(path)
+
+
+class ChunkStore:
+    """Columnar, read-only view over an index directory's chunks.
+
+    Backed by an mmap of `chunks.bin` so construction only parses the small
+    header; chunk text is decoded on access and ranking features (section ids,
+    the chunk x token CSR matrix) are read straight from the mapped arrays.
+    """
+
+    def __init__(self, buf: Any) -> None:
+        self._buf = buf
+        if len(buf) < _PREFIX.size:
+            raise ValidationError("INDEX_CHUNK_STORE_INVALID", "chunks.bin is truncated")
+        magic, header_len = _PREFIX.unpack_from(buf, 0)
+        if magic != CHUNK_STORE_MAGIC:
+            raise ValidationError("INDEX_CHUNK_STORE_INVALID", "chunks.bin has an unknown file signature")
+        if _PREFIX.size + header_len > len(buf):
+            raise ValidationError("INDEX_CHUNK_STORE_INVALID", "chunks.bin is truncated")
+        try:
+            header = json.loads(bytes(buf[_PREFIX.size : _PREFIX.size + header_len]).decode("utf-8"))
+        except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+            raise ValidationError("INDEX_CHUNK_STORE_INVALID", f"chunks.bin header is corrupt: {exc}") from exc
+        if not isinstance(header, dict) or header.get("format") != CHUNK_STORE_FORMAT:
+            format_ = header.get("format") if isinstance(header, dict) else None
+            raise ValidationError("INDEX_CHUNK_STORE_INVALID", f"Unsupported chunks.bin format {format_}")
+        self._data_start = _align8(_PREFIX.size + header_len)
+        try:
+            self._segments: dict[str, list[Any]] = header["segments"]
+            self.count = int(header["count"])
+            self.docs: list[dict[str, Any]] = header["docs"]
+            self.items: list[dict[str, Any]] = header["items"]
+            self.sections: list[str] = header["sections"]
+            self._item_ids = {entry["name"]: i for i, entry in enumerate(self.items)}
+            # A partially written file must fail here, not on first access to a segment past its end.
+            for name, (offset, size, dtype) in self._segments.items():
+                if offset < 0 or size < 0 or self._data_start + offset + size * np.dtype(dtype).itemsize > len(buf):
+                    raise ValidationError("INDEX_CHUNK_STORE_INVALID", f"chunks.bin segment {name} is truncated")
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValidationError("INDEX_CHUNK_STORE_INVALID", f"chunks.bin header is incomplete: {exc}") from exc
+
+        self.doc_id = self._array("doc_id")
+        self.item_id = self._array("item_id")
+        self.section_id = self._array("section_id")
+        self.order = self._array("order")
+        self.token_offsets = self._array("tokens.offsets")
+        self.token_ids = self._array("tokens.ids")
+        self._text_offsets = self._array("text.offsets")
+        self._vocab_offsets = self._array("vocab.offsets")
+        self._item_chunk_offsets = self._array("item_chunks.offsets")
+        self._item_chunk_indices = self._array("item_chunks.indices")
+        self._vocab = _StringColumn(self, "vocab", self._vocab_offsets)
+
+    @classmethod
+    def open(cls, index_dir: Path) -> "ChunkStore":
+        path = index_dir / CHUNK_STORE_FILE
+        # mmap refuses empty files; a zero-byte chunks.bin is as unusable as a truncated one.
+        if path.exists() and path.stat().st_size > 0:
+            with path.open("rb") as fh:
+                buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                return cls(buf)
+            except ValidationError:
+                buf.close()
+        # Indexes without a current chunks.bin: encode the JSONL in memory once.
+        rows: list[dict[str, Any]] = []
+        with (index_dir / "chunks.jsonl").open("r", encoding="utf-8") as fh:
+            for line in fh:
+                rows.append(json.loads(line))
+        return cls(encode_chunk_store(rows))
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buf)
+
+    def _array(self, name: str) -> np.ndarray:
+        offset, size, dtype = self._segments[name]
+        return np.frombuffer(self._buf, dtype=np.dtype(dtype), count=size, offset=self._data_start + offset)
+
+    def _string(self, column: str, offsets: np.ndarray, idx: int) -> str:
+        base = self._data_start + self._segments[f"{column}.blob"][0]
+        start = base + int(offsets[idx])
+        end = base + int(offsets[idx + 1])
+        return bytes(self._buf[start:end]).decode("utf-8")
+
+    def text(self, idx: int) -> str:
+        return self._string("text", self._text_offsets, idx)
+
+    def section(self, idx: int) -> str:
+        return self.sections[int(self.section_id[idx])]
+
+    def item(self, idx: int) -> str:
+        return str(self.items[int(self.item_id[idx])]["name"])
+
+    def doc(self, idx: int) -> dict[str, Any]:
+        return self.docs[int(self.doc_id[idx])]
+
+    def token_ids_for(self, tokens: set[str]) -> np.ndarray:
+        found: list[int] = []
+        for token in tokens:
+            pos = bisect.bisect_left(self._vocab, token)
+            if pos < len(self._vocab) and self._vocab[pos] == token:
+                found.append(pos)
+        return np.asarray(sorted(found), dtype="<i4")
+
+    def item_indices(self, item: str) -> list[int]:
+        item_id = self._item_ids.get(item)
+        if item_id is None:
+            return []
+        start = int(self._item_chunk_offsets[item_id])
+        end = int(self._item_chunk_offsets[item_id + 1])
+        return [int(i) for i in self._item_chunk_indices[start:end]]
+
+    def item_doc(self, item: str) -> dict[str, Any] | None:
+        item_id = self._item_ids.get(item)
+        if item_id is None:
+            return None
+        return self.docs[int(self.items[item_id]["doc"])]
+
+
+class _StringColumn:
+    """Sequence view over a string column, decoding entries on access (for bisect)."""
+
+    def __init__(self, store: ChunkStore, column: str, offsets: np.ndarray) -> None:
+        self._store = store
+        self._column = column
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx: int) -> str:
+        return self._store._string(self._column, self._offsets, idx)
@@ -4,10 +4,8 @@ import json
 import re
 import shlex
 import subprocess
-import statistics
 import sys
 import time
-import tracemalloc
 from pathlib import Path
 from typing import Optional
 
@@ -16,13 +14,20 @@ from rich.console import Console
 from rich.syntax import Syntax
 from rich.table import Table
 
-from tref.api import ask
 from tref.config import (
     CUSTOM_INDEX_ROOT,
+    DAEMON_SOCKET,
     DEFAULT_FRESHNESS_POLICY,
+    DEFAULT_HTTP_HOST,
+    DEFAULT_HTTP_MAX_PENDING,
+    DEFAULT_HTTP_PORT,
+    DEFAULT_HTTP_TIMEOUT_SECONDS,
+    DEFAULT_HTTP_WORKERS,
     DEFAULT_LLM_MODEL,
     DEFAULT_TOP_K,
     DEFAULT_EXAMPLE_LANG,
+    HTTP_ALLOW_LLM,
+    USE_DAEMON,
     get_remote_settings,
     get_user_defaults,
     load_remote_config,
@@ -32,8 +37,8 @@ from tref.config import (
     save_remote_config,
     save_user_config,
 )
+from tref.daemon import daemon_ask, daemon_request, serve
 from tref.errors import TrefError
-from tref.indexer import build_indexes
 from tref.kb import parse_library_version
 from tref.updater import freshness_status, update_indexes
 
@@ -269,9 +274,11 @@ def _print_results(payload: dict, verbose: bool = False) -> None:
 
     if verbose:
         _print_section("Preview")
+        federated = bool((payload.get("provenance") or {}).get("federated"))
         for idx, result in enumerate(payload["results"][:3], start=1):
+            origin = f"{result['library']}@{result['version']} " if federated else ""
             console.print(
-                f"{idx}. {result['item']} ({result.get('section', '')}) confidence={result['confidence']:.3f}"
+                f"{idx}. {origin}{result['item']} ({result.get('section', '')}) confidence={result['confidence']:.3f}"
             )
             if result.get("doc_url"):
                 console.print(f"source: {result.get('doc_url')}")
@@ -346,22 +353,26 @@ def _execute_query(
             query_tokens = query_tokens[1:]
             query_text = " ".join(query_tokens).strip()
 
+    params = {
+        "query": query_text,
+        "library": library,
+        "version": version,
+        "top_k": top_k,
+        "llm": llm,
+        "llm_model": model,
+        "strict_fresh": strict_fresh,
+        "freshness_policy": freshness_policy,
+        "no_autodetect": no_autodetect,
+        "include_full_doc": full_doc,
+        "preferred_language": lang,
+        "index_root": index_root,
+    }
     try:
-        payload = ask(
-            query_text,
-            library=library,
-            version=version,
-            top_k=top_k,
-            json_mode=True,
-            llm=llm,
-            llm_model=model,
-            strict_fresh=strict_fresh,
-            freshness_policy=freshness_policy,
-            no_autodetect=no_autodetect,
-            include_full_doc=full_doc,
-            preferred_language=lang,
-            index_root=index_root,
-        )
+        payload = daemon_ask(params) if USE_DAEMON else None
+        if payload is None:
+            from tref.api import ask
+
+            payload = ask(json_mode=True, **params)
     except Exception as exc:
         _exit_for_error(exc)
 
@@ -623,7 +634,9 @@ def main(ctx: typer.Context) -> None:
 @app.command("query")
 def query_cmd(
     query_parts: list[str] = typer.Argument(..., metavar="[LIB@VER] QUERY"),
-    library: Optional[str] = typer.Option(None, "--library", "-l"),
+    library: Optional[str] = typer.Option(
+        None, "--library", "-l", help="Library, or a comma-separated list (LIB[@VER],...) to search together."
+    ),
     version: Optional[str] = typer.Option(None, "--version", "-v"),
     json_output: bool = typer.Option(False, "--json", help="Return JSON output for agents."),
     top_k: int = typer.Option(DEFAULT_TOP_K, "--top-k", min=1, max=20),
@@ -714,10 +727,14 @@ def live_cmd(
 @app.command("update")
 def update_cmd(
     strict_verify: bool = typer.Option(True, "--strict-verify/--no-strict-verify"),
+    only: Optional[str] = typer.Option(
+        None, "--only", help="Comma-separated LIB or LIB@VER to install or refresh (default: configured subscriptions)."
+    ),
 ) -> None:
     """Download latest prebuilt indexes from GitHub Releases."""
+    selection = [name.strip() for name in only.split(",") if name.strip()] if only is not None else None
     try:
-        update_indexes(silent=False, strict_verify=strict_verify)
+        update_indexes(silent=False, strict_verify=strict_verify, only=selection)
     except Exception as exc:
         _exit_for_error(exc)
 
@@ -748,33 +765,109 @@ def doctor_cmd() -> None:
     console.print(table)
 
 
+def _latency_summary(values_ms: list[float]) -> dict[str, float]:
+    import statistics
+
+    ordered = sorted(values_ms)
+    n = len(ordered)
+    return {
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[max(0, int(n * 0.95) - 1)], 3),
+        "max_ms": round(ordered[-1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def _stage_summary(samples: list[dict[str, float]]) -> dict[str, dict[str, float]]:
+    names = sorted({name for sample in samples for name in sample})
+    # A stage missing from a run (e.g. library detection when -l is given) took 0 ms there.
+    return {name: _latency_summary([sample.get(name, 0.0) for sample in samples]) for name in names}
+
+
 @app.command("bench")
 def bench_cmd(
     query: str = typer.Argument(..., help="Benchmark query text"),
     library: Optional[str] = typer.Option(None, "--library", "-l"),
     version: Optional[str] = typer.Option(None, "--version", "-v"),
     runs: int = typer.Option(20, "--runs", min=5, max=500),
+    cold_runs: int = typer.Option(3, "--cold-runs", min=0, max=50, help="Extra runs with in-process caches cleared."),
     index_root: Optional[Path] = typer.Option(None, "--index-root"),
+    profile: Optional[Path] = typer.Option(None, "--profile", help="Write cProfile stats for the warm runs here."),
+    trace_memory: bool = typer.Option(
+        False, "--trace-memory", help="Measure peak memory in a separate pass (tracemalloc slows queries)."
+    ),
 ) -> None:
-    """Benchmark query latency and peak memory usage."""
-    latencies_ms: list[float] = []
-    tracemalloc.start()
-
-    for _ in range(runs):
-        start = time.perf_counter()
-        ask(
-            query,
-            library=library,
-            version=version,
-            json_mode=True,
-            freshness_policy="offline-only",
-            index_root=index_root,
-        )
-        elapsed = (time.perf_counter() - start) * 1000
+    """Benchmark query latency per pipeline stage, cold and warm."""
+    import statistics
+    import tracemalloc
+    from contextlib import ExitStack
+
+    from tref.api import ask
+    from tref.config import RESPONSE_CACHE
+    from tref.kb import clear_manifest_cache
+    from tref.responsecache import ResponseCache
+    from tref.retrieval import Retriever
+    from tref.timing import collect_stages
+
+    query_cache = Retriever.query_embedding_cache()
+    response_cache = ResponseCache.shared()
+
+    def run_once() -> tuple[float, dict[str, float]]:
+        with collect_stages() as timer:
+            start = time.perf_counter()
+            ask(
+                query,
+                library=library,
+                version=version,
+                json_mode=True,
+                freshness_policy="offline-only",
+                index_root=index_root,
+            )
+            elapsed = (time.perf_counter() - start) * 1000
+        stages = timer.as_ms()
+        stages["other"] = max(0.0, elapsed - sum(stages.values()))
+        return elapsed, stages
+
+    def reset_caches() -> None:
+        Retriever.clear_cache()
+        clear_manifest_cache()
+
+    def active_caches() -> dict[str, bool]:
+        return {"query_embeddings": query_cache.enabled, "responses": RESPONSE_CACHE and response_cache.enabled}
+
+    warm_caches = active_caches()
+
+    # The first run also pays for model and index loading.
+    first_ms, first_stages = run_once()
+    latencies_ms = [first_ms]
+    warm_stages: list[dict[str, float]] = []
+    profiler = None
+    if profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    for _ in range(runs - 1):
+        elapsed, stages = run_once()
         latencies_ms.append(elapsed)
-
-    current, peak = tracemalloc.get_traced_memory()
-    tracemalloc.stop()
+        warm_stages.append(stages)
+    if profiler is not None:
+        profiler.disable()
+        profile.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(profile))
+
+    cold_latencies: list[float] = []
+    cold_stages: list[dict[str, float]] = []
+    # Cold runs must embed and rank for real, so the persistent caches are bypassed, not just the in-process ones.
+    with ExitStack() as bypass:
+        bypass.enter_context(query_cache.suspended())
+        bypass.enter_context(response_cache.suspended())
+        cold_caches = active_caches()
+        for _ in range(cold_runs):
+            reset_caches()
+            elapsed, stages = run_once()
+            cold_latencies.append(elapsed)
+            cold_stages.append(stages)
 
     payload = {
         "runs": runs,
@@ -782,9 +875,37 @@ def bench_cmd(
         "p95_ms": round(sorted(latencies_ms)[int(runs * 0.95) - 1], 2),
         "min_ms": round(min(latencies_ms), 2),
         "max_ms": round(max(latencies_ms), 2),
-        "mem_current_mb": round(current / (1024 * 1024), 3),
-        "mem_peak_mb": round(peak / (1024 * 1024), 3),
+        "first_run": {
+            "total_ms": round(first_ms, 3),
+            "caches": warm_caches,
+            "stages": {name: round(ms, 3) for name, ms in sorted(first_stages.items())},
+        },
+        "warm": {
+            "runs": len(warm_stages),
+            "caches": warm_caches,
+            **_latency_summary(latencies_ms[1:]),
+            "stages": _stage_summary(warm_stages),
+        },
     }
+    if cold_runs:
+        payload["cold"] = {
+            "runs": cold_runs,
+            "caches": cold_caches,
+            **_latency_summary(cold_latencies),
+            "stages": _stage_summary(cold_stages),
+        }
+    if profile:
+        payload["profile"] = str(profile)
+
+    if trace_memory:
+        reset_caches()
+        tracemalloc.start()
+        run_once()
+        run_once()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        payload["mem_current_mb"] = round(current / (1024 * 1024), 3)
+        payload["mem_peak_mb"] = round(peak / (1024 * 1024), 3)
     console.print_json(json.dumps(payload, indent=2))
 
 
@@ -807,6 +928,7 @@ def remote_set(
     release_asset_name: Optional[str] = typer.Option(None, "--release-asset-name"),
     release_checksum_asset_name: Optional[str] = typer.Option(None, "--release-checksum-asset-name"),
     release_signature_asset_name: Optional[str] = typer.Option(None, "--release-signature-asset-name"),
+    release_artifacts_asset_name: Optional[str] = typer.Option(None, "--release-artifacts-asset-name"),
 ) -> None:
     current = load_remote_config()
     updates = {}
@@ -820,6 +942,8 @@ def remote_set(
         updates["release_checksum_asset_name"] = release_checksum_asset_name
     if release_signature_asset_name:
         updates["release_signature_asset_name"] = release_signature_asset_name
+    if release_artifacts_asset_name:
+        updates["release_artifacts_asset_name"] = release_artifacts_asset_name
     if not updates:
         raise typer.BadParameter("No values provided to set.")
     current.update(updates)
@@ -859,6 +983,21 @@ def config_set(
     release_asset_name: Optional[str] = typer.Option(None, "--release-asset-name"),
     release_checksum_asset_name: Optional[str] = typer.Option(None, "--release-checksum-asset-name"),
     release_signature_asset_name: Optional[str] = typer.Option(None, "--release-signature-asset-name"),
+    retriever_cache_mb: Optional[int] = typer.Option(
+        None, "--retriever-cache-mb", min=0, help="Memory budget for loaded indexes, in MB."
+    ),
+    retriever_pinned: Optional[str] = typer.Option(
+        None, "--retriever-pinned", help="Comma-separated LIB or LIB@VER kept loaded regardless of the budget."
+    ),
+    response_cache: Optional[bool] = typer.Option(
+        None, "--response-cache/--no-response-cache", help="Reuse responses for repeated queries on the same index build."
+    ),
+    http_allow_llm: Optional[bool] = typer.Option(
+        None, "--http-allow-llm/--no-http-allow-llm", help="Let `tref http` answer llm=true requests."
+    ),
+    subscriptions: Optional[str] = typer.Option(
+        None, "--subscriptions", help="Comma-separated LIB or LIB@VER that updates fetch; empty means all."
+    ),
 ) -> None:
     cfg = load_user_config()
     updates: dict[str, object] = {}
@@ -891,6 +1030,16 @@ def config_set(
         updates["release_checksum_asset_name"] = release_checksum_asset_name
     if release_signature_asset_name is not None:
         updates["release_signature_asset_name"] = release_signature_asset_name
+    if retriever_cache_mb is not None:
+        updates["retriever_cache_mb"] = int(retriever_cache_mb)
+    if retriever_pinned is not None:
+        updates["retriever_pinned"] = [name.strip() for name in retriever_pinned.split(",") if name.strip()]
+    if response_cache is not None:
+        updates["response_cache"] = bool(response_cache)
+    if http_allow_llm is not None:
+        updates["http_allow_llm"] = bool(http_allow_llm)
+    if subscriptions is not None:
+        updates["subscriptions"] = [name.strip() for name in subscriptions.split(",") if name.strip()]
     if not updates:
         raise typer.BadParameter("No values provided to set.")
     cfg.update(updates)
@@ -917,15 +1066,101 @@ def config_reset() -> None:
 def build_index_cmd(
     kb_path: Path = typer.Argument(..., exists=True, file_okay=False, dir_okay=True),
     output: Path = typer.Option(CUSTOM_INDEX_ROOT, "--output", "-o"),
+    index_type: str = typer.Option("flat", "--index-type", help="flat|hnsw|ivfpq"),
+    hnsw_m: Optional[int] = typer.Option(None, "--hnsw-m", min=4, help="HNSW graph degree."),
+    ef_construction: Optional[int] = typer.Option(None, "--ef-construction", min=1, help="HNSW build-time beam width."),
+    ef_search: Optional[int] = typer.Option(None, "--ef-search", min=1, help="HNSW default search beam width."),
+    nlist: Optional[int] = typer.Option(None, "--nlist", min=1, help="IVF cluster count (capped by data size)."),
+    nprobe: Optional[int] = typer.Option(None, "--nprobe", min=1, help="IVF default clusters probed per query."),
+    pq_m: Optional[int] = typer.Option(None, "--pq-m", min=1, help="PQ sub-quantizers (must divide the dimension)."),
+    pq_nbits: Optional[int] = typer.Option(None, "--pq-nbits", min=1, max=16, help="Bits per PQ code."),
+    incremental: bool = typer.Option(
+        False, "--incremental", help="Re-embed only documents whose content hash changed; skip unchanged versions."
+    ),
+    jobs: int = typer.Option(1, "--jobs", "-j", min=1, help="Worker processes for KB parsing."),
+    merged: bool = typer.Option(
+        False, "--merged", help="Also write one merged index over all libraries/versions (searched with ID filters)."
+    ),
 ) -> None:
     """Build FAISS indexes from KB markdown files."""
+    from tref.indexer import build_indexes
+
+    index_type = index_type.strip().lower()
+    candidates = {
+        "hnsw": {"m": hnsw_m, "ef_construction": ef_construction, "ef_search": ef_search},
+        "ivfpq": {"nlist": nlist, "nprobe": nprobe, "pq_m": pq_m, "pq_nbits": pq_nbits},
+    }
+    index_params = {k: v for k, v in candidates.get(index_type, {}).items() if v is not None}
     try:
-        summary = build_indexes(kb_root=kb_path, output_root=output)
+        summary = build_indexes(
+            kb_root=kb_path,
+            output_root=output,
+            index_type=index_type,
+            index_params=index_params,
+            incremental=incremental,
+            jobs=jobs,
+            merged=merged,
+        )
     except Exception as exc:
         _exit_for_error(exc)
     console.print_json(json.dumps(summary))
 
 
+@app.command("serve")
+def serve_cmd(
+    socket_path: Path = typer.Option(DAEMON_SOCKET, "--socket", help="Unix socket path to listen on."),
+    stop: bool = typer.Option(False, "--stop", help="Stop the daemon listening on --socket."),
+    ping: bool = typer.Option(False, "--ping", help="Report whether a daemon is listening on --socket."),
+) -> None:
+    """Run a query daemon that keeps models and indexes warm between CLI calls."""
+    try:
+        if stop or ping:
+            reply = daemon_request({"op": "shutdown" if stop else "ping"}, socket_path=socket_path)
+            if reply is None:
+                console.print(f"[yellow]No tref daemon listening on {socket_path}.[/yellow]")
+                raise typer.Exit(code=ExitCodes.ERROR)
+            console.print_json(json.dumps(reply))
+            return
+        console.print(f"tref daemon listening on [bold]{socket_path}[/bold] (Ctrl+C to stop)")
+        serve(socket_path=socket_path)
+    except KeyboardInterrupt:
+        return
+    except typer.Exit:
+        raise
+    except Exception as exc:
+        _exit_for_error(exc)
+
+
+@app.command("http")
+def http_cmd(
+    host: str = typer.Option(DEFAULT_HTTP_HOST, "--host"),
+    port: int = typer.Option(DEFAULT_HTTP_PORT, "--port", min=1, max=65535),
+    workers: int = typer.Option(DEFAULT_HTTP_WORKERS, "--workers", min=1, max=64, help="Concurrent query workers."),
+    max_pending: int = typer.Option(
+        DEFAULT_HTTP_MAX_PENDING, "--max-pending", min=0, help="Queued requests allowed before answering 503."
+    ),
+    timeout: float = typer.Option(DEFAULT_HTTP_TIMEOUT_SECONDS, "--timeout", min=0.1, help="Per-request timeout in seconds."),
+    allow_llm: bool = typer.Option(
+        HTTP_ALLOW_LLM, "--allow-llm/--no-allow-llm", help="Accept ask requests with llm=true."
+    ),
+) -> None:
+    """Serve ask/status/freshness as HTTP JSON endpoints."""
+    from tref.server import serve_http
+
+    console.print(
+        f"tref http listening on [bold]http://{host}:{port}[/bold] "
+        f"(workers={workers}, max_pending={max_pending}, timeout={timeout}s, llm={'on' if allow_llm else 'off'})"
+    )
+    try:
+        serve_http(
+            host=host, port=port, workers=workers, max_pending=max_pending, timeout=timeout, allow_llm=allow_llm
+        )
+    except KeyboardInterrupt:
+        return
+    except Exception as exc:
+        _exit_for_error(exc)
+
+
 def run() -> None:
     known = {
         "query",
@@ -937,6 +1172,8 @@ def run() -> None:
         "remote",
         "config",
         "build-index",
+        "serve",
+        "http",
         "eval",
         "--help",
         "-h",
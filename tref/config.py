@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from pathlib import Path
 from typing import Any
 
@@ -16,6 +17,12 @@ CONFIG_FILE = TREF_HOME / "config.json"
 MANIFEST_CACHE = CACHE_ROOT / "manifest.json"
 UPDATE_STATE_CACHE = CACHE_ROOT / "update_state.json"
 REMOTE_CONFIG_FILE = TREF_HOME / "remote.json"
+DEFAULT_DAEMON_SOCKET = TREF_HOME / "tref.sock"
+EMBED_CACHE_FILE = CACHE_ROOT / "embeddings.sqlite"
+QUERY_CACHE_FILE = CACHE_ROOT / "query_embeddings.sqlite"
+RESPONSE_CACHE_FILE = CACHE_ROOT / "responses.sqlite"
+REFRESH_LOCK_FILE = CACHE_ROOT / "refresh.lock"
+UPDATE_LOCK_FILE = CACHE_ROOT / "update.lock"
 
 # Source of truth is pavandhadge/tref:
 # - Human release page: https://github.com/pavandhadge/tref/releases/latest
@@ -25,11 +32,18 @@ DEFAULT_RELEASES_API_URL = "https://api.github.com/repos/pavandhadge/tref/releas
 DEFAULT_RELEASE_ASSET_NAME = "tref-indexes.tar.gz"
 DEFAULT_RELEASE_CHECKSUM_ASSET_NAME = "tref-indexes.tar.gz.sha256"
 DEFAULT_RELEASE_SIGNATURE_ASSET_NAME = "tref-indexes.tar.gz.sig"
+DEFAULT_RELEASE_ARTIFACTS_ASSET_NAME = "tref-artifacts.json"
 
 DEFAULT_TOP_K = 5
 DEFAULT_LLM_MODEL = "llama3.1:8b-instruct"
 DEFAULT_EXAMPLE_LANG = None
 
+DEFAULT_HTTP_HOST = "127.0.0.1"
+DEFAULT_HTTP_PORT = 8765
+DEFAULT_HTTP_WORKERS = min(4, os.cpu_count() or 1)
+DEFAULT_HTTP_MAX_PENDING = 32
+DEFAULT_HTTP_TIMEOUT_SECONDS = 30.0
+
 
 def _as_bool(value: Any, default: bool) -> bool:
     if isinstance(value, bool):
@@ -59,25 +73,79 @@ def _as_float(value: Any, default: float) -> float:
         return default
 
 
+def _as_str_list(value: Any, default: list[str]) -> list[str]:
+    if isinstance(value, str):
+        return [part.strip() for part in value.split(",") if part.strip()]
+    if isinstance(value, (list, tuple)):
+        return [str(part).strip() for part in value if str(part).strip()]
+    return default
+
+
+class _ConfigSnapshot:
+    """Parsed contents of one JSON config file, re-read only when its mtime/size changes."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._loaded = False
+        self._data: dict[str, Any] = {}
+
+    def _current_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self) -> dict[str, Any]:
+        """Return the shared parsed dict; callers must not mutate it."""
+        stamp = self._current_stamp()
+        with self._lock:
+            if self._loaded and stamp == self._stamp:
+                return self._data
+            data: dict[str, Any] = {}
+            if stamp is not None:
+                try:
+                    parsed = json.loads(self.path.read_text(encoding="utf-8"))
+                    data = parsed if isinstance(parsed, dict) else {}
+                except Exception:
+                    data = {}
+            self._data = data
+            self._stamp = stamp
+            self._loaded = True
+            return data
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+
+_USER_CONFIG = _ConfigSnapshot(CONFIG_FILE)
+_REMOTE_CONFIG = _ConfigSnapshot(REMOTE_CONFIG_FILE)
+
+
+def invalidate_config() -> None:
+    """Force the next lookup to re-read config.json and remote.json."""
+    _USER_CONFIG.invalidate()
+    _REMOTE_CONFIG.invalidate()
+
+
 def load_user_config() -> dict[str, Any]:
-    if not CONFIG_FILE.exists():
-        return {}
-    try:
-        data = json.loads(CONFIG_FILE.read_text(encoding="utf-8"))
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+    return dict(_USER_CONFIG.get())
 
 
 def save_user_config(data: dict[str, Any]) -> None:
     ensure_dirs()
     _atomic_write_json(CONFIG_FILE, data)
+    _USER_CONFIG.invalidate()
 
 
 def reset_user_config() -> None:
     ensure_dirs()
     if CONFIG_FILE.exists():
         CONFIG_FILE.unlink()
+    _USER_CONFIG.invalidate()
 
 
 def _cfg_value(config_key: str, env_key: str | None, default: Any) -> Any:
@@ -85,7 +153,7 @@ def _cfg_value(config_key: str, env_key: str | None, default: Any) -> Any:
         env_val = os.getenv(env_key)
         if env_val is not None:
             return env_val
-    cfg = load_user_config()
+    cfg = _USER_CONFIG.get()
     if config_key in cfg:
         return cfg[config_key]
     return default
@@ -107,6 +175,29 @@ COSIGN_BIN = str(_cfg_value("cosign_bin", "TREF_COSIGN_BIN", "cosign"))
 DEFAULT_FRESHNESS_POLICY = str(_cfg_value("freshness_policy", "TREF_FRESHNESS_POLICY", "warn"))
 DEFAULT_TOP_K = _as_int(_cfg_value("top_k", None, DEFAULT_TOP_K), DEFAULT_TOP_K)
 DEFAULT_LLM_MODEL = str(_cfg_value("llm_model", None, DEFAULT_LLM_MODEL))
+DAEMON_SOCKET = Path(str(_cfg_value("daemon_socket", "TREF_DAEMON_SOCKET", DEFAULT_DAEMON_SOCKET))).expanduser()
+USE_DAEMON = _as_bool(_cfg_value("use_daemon", "TREF_USE_DAEMON", True), True)
+DAEMON_TIMEOUT_SECONDS = _as_float(_cfg_value("daemon_timeout_seconds", "TREF_DAEMON_TIMEOUT_SECONDS", 120.0), 120.0)
+HNSW_EF_SEARCH = _as_int(_cfg_value("hnsw_ef_search", "TREF_HNSW_EF_SEARCH", 0), 0)
+IVF_NPROBE = _as_int(_cfg_value("ivf_nprobe", "TREF_IVF_NPROBE", 0), 0)
+EMBED_CACHE_MAX_MB = _as_int(_cfg_value("embed_cache_max_mb", "TREF_EMBED_CACHE_MAX_MB", 512), 512)
+FRESHNESS_TTL_SECONDS = _as_float(_cfg_value("freshness_ttl_seconds", "TREF_FRESHNESS_TTL_SECONDS", 5.0), 5.0)
+SKIP_FRESHNESS_OFFLINE = _as_bool(_cfg_value("skip_freshness_offline", "TREF_SKIP_FRESHNESS_OFFLINE", False), False)
+BACKGROUND_REFRESH = _as_bool(_cfg_value("background_refresh", "TREF_BACKGROUND_REFRESH", True), True)
+DELTA_UPDATES = _as_bool(_cfg_value("delta_updates", "TREF_DELTA_UPDATES", True), True)
+SUBSCRIPTIONS = _as_str_list(_cfg_value("subscriptions", "TREF_SUBSCRIPTIONS", []), [])
+UPDATE_LOCK_WAIT_SECONDS = _as_float(
+    _cfg_value("update_lock_wait_seconds", "TREF_UPDATE_LOCK_WAIT_SECONDS", 600.0), 600.0
+)
+HTTP_ALLOW_LLM = _as_bool(_cfg_value("http_allow_llm", "TREF_HTTP_ALLOW_LLM", False), False)
+RESPONSE_CACHE = _as_bool(_cfg_value("response_cache", "TREF_RESPONSE_CACHE", False), False)
+RESPONSE_CACHE_MAX_MB = _as_int(_cfg_value("response_cache_max_mb", "TREF_RESPONSE_CACHE_MAX_MB", 64), 64)
+QUERY_CACHE_MAX_MB = _as_int(_cfg_value("query_cache_max_mb", "TREF_QUERY_CACHE_MAX_MB", 64), 64)
+RETRIEVER_CACHE_MB = _as_int(_cfg_value("retriever_cache_mb", "TREF_RETRIEVER_CACHE_MB", 1024), 1024)
+RETRIEVER_PINNED = _as_str_list(_cfg_value("retriever_pinned", "TREF_RETRIEVER_PINNED", []), [])
+USE_MERGED_INDEX = _as_bool(_cfg_value("use_merged_index", "TREF_USE_MERGED_INDEX", True), True)
+ROUTE_MIN_SIMILARITY = _as_float(_cfg_value("route_min_similarity", "TREF_ROUTE_MIN_SIMILARITY", 0.6), 0.6)
+ROUTE_MIN_MARGIN = _as_float(_cfg_value("route_min_margin", "TREF_ROUTE_MIN_MARGIN", 0.03), 0.03)
 _lang = _cfg_value("example_language", None, DEFAULT_EXAMPLE_LANG)
 DEFAULT_EXAMPLE_LANG = str(_lang) if _lang else None
 
@@ -124,76 +215,82 @@ def _atomic_write_json(path: Path, data: dict[str, Any]) -> None:
 
 
 def load_remote_config() -> dict[str, Any]:
-    ensure_dirs()
-    if not REMOTE_CONFIG_FILE.exists():
-        return {}
-    try:
-        return json.loads(REMOTE_CONFIG_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return {}
+    return dict(_REMOTE_CONFIG.get())
 
 
 def save_remote_config(data: dict[str, Any]) -> None:
     ensure_dirs()
     _atomic_write_json(REMOTE_CONFIG_FILE, data)
+    _REMOTE_CONFIG.invalidate()
 
 
 def reset_remote_config() -> None:
     ensure_dirs()
     if REMOTE_CONFIG_FILE.exists():
         REMOTE_CONFIG_FILE.unlink()
+    _REMOTE_CONFIG.invalidate()
 
 
 def get_kb_manifest_url() -> str:
-    user = load_user_config()
+    user = _USER_CONFIG.get()
     return (
         os.getenv("TREF_KB_MANIFEST_URL")
         or user.get("kb_manifest_url")
-        or load_remote_config().get("kb_manifest_url")
+        or _REMOTE_CONFIG.get().get("kb_manifest_url")
         or DEFAULT_KB_MANIFEST_URL
     )
 
 
 def get_releases_api_url() -> str:
-    user = load_user_config()
+    user = _USER_CONFIG.get()
     return (
         os.getenv("TREF_RELEASES_API")
         or user.get("releases_api_url")
-        or load_remote_config().get("releases_api_url")
+        or _REMOTE_CONFIG.get().get("releases_api_url")
         or DEFAULT_RELEASES_API_URL
     )
 
 
 def get_release_asset_name() -> str:
-    user = load_user_config()
+    user = _USER_CONFIG.get()
     return (
         os.getenv("TREF_RELEASE_ASSET")
         or user.get("release_asset_name")
-        or load_remote_config().get("release_asset_name")
+        or _REMOTE_CONFIG.get().get("release_asset_name")
         or DEFAULT_RELEASE_ASSET_NAME
     )
 
 
 def get_release_checksum_asset_name() -> str:
-    user = load_user_config()
+    user = _USER_CONFIG.get()
     return (
         os.getenv("TREF_RELEASE_CHECKSUM_ASSET")
         or user.get("release_checksum_asset_name")
-        or load_remote_config().get("release_checksum_asset_name")
+        or _REMOTE_CONFIG.get().get("release_checksum_asset_name")
         or DEFAULT_RELEASE_CHECKSUM_ASSET_NAME
     )
 
 
 def get_release_signature_asset_name() -> str:
-    user = load_user_config()
+    user = _USER_CONFIG.get()
     return (
         os.getenv("TREF_RELEASE_SIGNATURE_ASSET")
         or user.get("release_signature_asset_name")
-        or load_remote_config().get("release_signature_asset_name")
+        or _REMOTE_CONFIG.get().get("release_signature_asset_name")
         or DEFAULT_RELEASE_SIGNATURE_ASSET_NAME
     )
 
 
+def get_release_artifacts_asset_name() -> str:
+    user = _USER_CONFIG.get()
+    return (
+        os.getenv("TREF_RELEASE_ARTIFACTS_ASSET")
+        or user.get("release_artifacts_asset_name")
+        or _REMOTE_CONFIG.get().get("release_artifacts_asset_name")
+        or DEFAULT_RELEASE_ARTIFACTS_ASSET_NAME
+    )
+
+
 def get_remote_settings() -> dict[str, Any]:
     return {
         "kb_manifest_url": get_kb_manifest_url(),
@@ -201,6 +298,7 @@ def get_remote_settings() -> dict[str, Any]:
         "release_asset_name": get_release_asset_name(),
         "release_checksum_asset_name": get_release_checksum_asset_name(),
         "release_signature_asset_name": get_release_signature_asset_name(),
+        "release_artifacts_asset_name": get_release_artifacts_asset_name(),
         "strict_verify": UPDATE_STRICT_VERIFY,
         "require_signature": REQUIRE_SIGNATURE,
         "config_file": str(CONFIG_FILE),
@@ -224,5 +322,26 @@ def get_user_defaults() -> dict[str, Any]:
         "max_download_bytes": MAX_DOWNLOAD_BYTES,
         "cosign_key_path": COSIGN_KEY_PATH,
         "cosign_bin": COSIGN_BIN,
+        "hnsw_ef_search": HNSW_EF_SEARCH,
+        "ivf_nprobe": IVF_NPROBE,
+        "embed_cache_max_mb": EMBED_CACHE_MAX_MB,
+        "query_cache_max_mb": QUERY_CACHE_MAX_MB,
+        "freshness_ttl_seconds": FRESHNESS_TTL_SECONDS,
+        "skip_freshness_offline": SKIP_FRESHNESS_OFFLINE,
+        "background_refresh": BACKGROUND_REFRESH,
+        "delta_updates": DELTA_UPDATES,
+        "subscriptions": SUBSCRIPTIONS,
+        "update_lock_wait_seconds": UPDATE_LOCK_WAIT_SECONDS,
+        "http_allow_llm": HTTP_ALLOW_LLM,
+        "response_cache": RESPONSE_CACHE,
+        "response_cache_max_mb": RESPONSE_CACHE_MAX_MB,
+        "retriever_cache_mb": RETRIEVER_CACHE_MB,
+        "retriever_pinned": RETRIEVER_PINNED,
+        "use_merged_index": USE_MERGED_INDEX,
+        "route_min_similarity": ROUTE_MIN_SIMILARITY,
+        "route_min_margin": ROUTE_MIN_MARGIN,
+        "daemon_socket": str(DAEMON_SOCKET),
+        "use_daemon": USE_DAEMON,
+        "daemon_timeout_seconds": DAEMON_TIMEOUT_SECONDS,
         "config_file": str(CONFIG_FILE),
     }
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any
+
+from tref import errors
+from tref.config import DAEMON_SOCKET, DAEMON_TIMEOUT_SECONDS, ensure_dirs
+from tref.errors import TrefError
+
+CONNECT_TIMEOUT_SECONDS = 0.5
+MAX_REQUEST_BYTES = 1024 * 1024
+ASK_PARAMS = {
+    "query",
+    "library",
+    "version",
+    "top_k",
+    "llm",
+    "llm_model",
+    "strict_fresh",
+    "freshness_policy",
+    "no_autodetect",
+    "include_full_doc",
+    "preferred_language",
+    "index_root",
+    "libraries",
+}
+
+
+def _encode_error(exc: Exception) -> dict[str, Any]:
+    if isinstance(exc, TrefError):
+        return {"type": type(exc).__name__, "code": exc.code, "message": exc.message}
+    return {"type": type(exc).__name__, "code": None, "message": str(exc)}
+
+
+def _decode_error(error: dict[str, Any]) -> Exception:
+    name = str(error.get("type") or "")
+    message = str(error.get("message") or "")
+    cls = getattr(errors, name, None)
+    if isinstance(cls, type) and issubclass(cls, TrefError):
+        return cls(str(error.get("code") or "DAEMON_ERROR"), message)
+    if name == "ValueError":
+        return ValueError(message)
+    return RuntimeError(message)
+
+
+def _dispatch(server: "_DaemonServer", request: dict[str, Any]) -> Any:
+    op = request.get("op")
+    if op == "ping":
+        from tref.retrieval import Retriever
+
+        return {
+            "pid": os.getpid(),
+            "socket": str(server.socket_path),
+            "retrievers": len(Retriever._cache),
+            "retriever_cache": Retriever.cache_stats(),
+        }
+    if op == "shutdown":
+        threading.Thread(target=server.shutdown, daemon=True).start()
+        return {"pid": os.getpid(), "stopping": True}
+    if op == "ask":
+        from tref.api import ask
+
+        params = {k: v for k, v in dict(request.get("params") or {}).items() if k in ASK_PARAMS}
+        if params.get("index_root"):
+            params["index_root"] = Path(params["index_root"])
+        return ask(json_mode=True, **params)
+    raise ValueError(f"unknown daemon op '{op}'")
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        line = self.rfile.readline(MAX_REQUEST_BYTES)
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            response = {"ok": True, "payload": _dispatch(self.server, request)}
+        except Exception as exc:
+            response = {"ok": False, "error": _encode_error(exc)}
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path) -> None:
+        self.socket_path = socket_path
+        super().__init__(str(socket_path), _DaemonHandler)
+
+
+def daemon_request(
+    request: dict[str, Any],
+    socket_path: Path = DAEMON_SOCKET,
+    timeout: float = DAEMON_TIMEOUT_SECONDS,
+) -> Any | None:
+    """Send one request to a running daemon; return None when no daemon is reachable."""
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    buf = bytearray()
+    sent = False
+    try:
+        sock.settimeout(CONNECT_TIMEOUT_SECONDS)
+        sock.connect(str(socket_path))
+        sock.settimeout(timeout)
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        sent = True
+        while not buf.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            buf.extend(chunk)
+    except socket.timeout:
+        if not sent:
+            return None
+        raise TrefError("DAEMON_TIMEOUT", f"Daemon at {socket_path} did not answer within {timeout}s") from None
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+    if not buf:
+        return None
+    response = json.loads(bytes(buf))
+    if response.get("ok"):
+        return response.get("payload")
+    raise _decode_error(dict(response.get("error") or {}))
+
+
+def daemon_ask(params: dict[str, Any], socket_path: Path = DAEMON_SOCKET) -> dict[str, Any] | None:
+    if params.get("index_root"):
+        params = {**params, "index_root": str(Path(params["index_root"]).expanduser().resolve())}
+    return daemon_request({"op": "ask", "params": params}, socket_path=socket_path)
+
+
+def serve(socket_path: Path = DAEMON_SOCKET) -> None:
+    if not hasattr(socket, "AF_UNIX"):
+        raise TrefError("DAEMON_UNSUPPORTED", "Unix domain sockets are not available on this platform")
+    ensure_dirs()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        if daemon_request({"op": "ping"}, socket_path=socket_path, timeout=CONNECT_TIMEOUT_SECONDS) is not None:
+            raise TrefError("DAEMON_RUNNING", f"A tref daemon is already listening on {socket_path}")
+        socket_path.unlink()
+
+    # Pay the native-library import cost once, before the first query arrives.
+    import tref.api  # noqa: F401
+
+    server = _DaemonServer(socket_path)
+    try:
+        os.chmod(socket_path, 0o600)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+
+from tref.config import EMBED_CACHE_FILE, EMBED_CACHE_MAX_MB
+from tref.sqlitecache import install_byte_counter, stored_bytes
+
+# After an eviction pass the cache is trimmed to this fraction of its cap, so a
+# build that keeps inserting does not evict on every batch.
+EVICT_TARGET_RATIO = 0.9
+SQLITE_BUSY_TIMEOUT_SECONDS = 10.0
+_LOOKUP_BATCH = 500
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed store of normalized embeddings keyed by (model, sha256(text)).
+
+    Backed by a single SQLite file under CACHE_ROOT so concurrent builds and
+    query processes can share it. Entries carry a last-used timestamp and the
+    least recently used ones are dropped once the total vector bytes exceed the
+    cap. Every failure degrades to a cache miss.
+    """
+
+    _instances: dict[Path, "EmbeddingCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: Path = EMBED_CACHE_FILE, max_bytes: int = EMBED_CACHE_MAX_MB * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._broken = False
+        self._suspended = False
+
+    @classmethod
+    def shared(cls, path: Path = EMBED_CACHE_FILE, max_bytes: int | None = None) -> "EmbeddingCache":
+        with cls._instances_lock:
+            cache = cls._instances.get(path)
+            if cache is None:
+                cache = cls._instances[path] = cls(path) if max_bytes is None else cls(path, max_bytes)
+            return cache
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and not self._broken and not self._suspended
+
+    @contextmanager
+    def suspended(self) -> Iterator[None]:
+        """Treat every lookup as a miss and skip writes inside the block, e.g. for cold benchmark runs."""
+        with self._lock:
+            previous, self._suspended = self._suspended, True
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._suspended = previous
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if not self.enabled:
+            return None
+        if self._conn is not None:
+            return self._conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, digest TEXT NOT NULL, dim INTEGER NOT NULL, "
+                "vector BLOB NOT NULL, last_used REAL NOT NULL, PRIMARY KEY (model, digest))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+            conn.commit()
+            install_byte_counter(conn, "embeddings", "vector")
+        except (sqlite3.Error, OSError):
+            self._broken = True
+            return None
+        self._conn = conn
+        return conn
+
+    def get_many(self, model: str, digests: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not digests:
+                return found
+            try:
+                unique = list(dict.fromkeys(digests))
+                for start in range(0, len(unique), _LOOKUP_BATCH):
+                    batch = unique[start : start + _LOOKUP_BATCH]
+                    marks = ",".join("?" * len(batch))
+                    rows = conn.execute(
+                        f"SELECT digest, dim, vector FROM embeddings WHERE model = ? AND digest IN ({marks})",
+                        [model, *batch],
+                    ).fetchall()
+                    for digest, dim, blob in rows:
+                        vec = np.frombuffer(blob, dtype="<f4")
+                        if vec.size == dim:
+                            found[digest] = vec
+                if found:
+                    now = time.time()
+                    conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND digest = ?",
+                        [(now, model, digest) for digest in found],
+                    )
+                    conn.commit()
+            except sqlite3.Error:
+                return found
+        return found
+
+    def put_many(self, model: str, digests: list[str], matrix: np.ndarray) -> None:
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not digests:
+                return
+            now = time.time()
+            rows = [
+                (model, digest, int(matrix.shape[1]), np.ascontiguousarray(matrix[i], dtype="<f4").tobytes(), now)
+                for i, digest in enumerate(digests)
+            ]
+            try:
+                # An upsert rather than INSERT OR REPLACE, whose implicit delete would bypass the byte-counter trigger.
+                conn.executemany(
+                    "INSERT INTO embeddings VALUES (?, ?, ?, ?, ?) ON CONFLICT (model, digest) DO UPDATE SET "
+                    "dim = excluded.dim, vector = excluded.vector, last_used = excluded.last_used",
+                    rows,
+                )
+                conn.commit()
+                self._evict(conn)
+            except sqlite3.Error:
+                return
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = stored_bytes(conn, "embeddings")
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        victims: list[tuple[int]] = []
+        for rowid, size in conn.execute("SELECT rowid, LENGTH(vector) FROM embeddings ORDER BY last_used, rowid"):
+            if total <= target:
+                break
+            total -= int(size)
+            victims.append((rowid,))
+        conn.executemany("DELETE FROM embeddings WHERE rowid = ?", victims)
+        conn.commit()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return {"enabled": False, "path": str(self.path)}
+            try:
+                entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                size = stored_bytes(conn, "embeddings")
+            except sqlite3.Error:
+                return {"enabled": False, "path": str(self.path)}
+        return {
+            "enabled": True,
+            "path": str(self.path),
+            "entries": int(entries),
+            "bytes": int(size),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def embed_texts(
+    embedder: Any,
+    texts: list[str],
+    model_name: str,
+    cache: EmbeddingCache | None = None,
+) -> tuple[np.ndarray, int]:
+    """Return L2-normalized float32 embeddings for `texts` and how many came from the cache.
+
+    Each distinct text is embedded at most once, and only when the cache does
+    not already hold it for `model_name`.
+    """
+    import faiss
+
+    if cache is None:
+        cache = EmbeddingCache.shared()
+    digests = [text_digest(text) for text in texts]
+    found = cache.get_many(model_name, digests)
+
+    missing: dict[str, str] = {}
+    for digest, text in zip(digests, texts):
+        if digest not in found and digest not in missing:
+            missing[digest] = text
+    if missing:
+        fresh = np.array(list(embedder.embed(list(missing.values()))), dtype="float32")
+        faiss.normalize_L2(fresh)
+        missing_digests = list(missing)
+        cache.put_many(model_name, missing_digests, fresh)
+        for row, digest in enumerate(missing_digests):
+            found[digest] = fresh[row]
+
+    matrix = np.empty((len(texts), len(next(iter(found.values())))) if texts else (0, 0), dtype="float32")
+    hits = 0
+    for i, digest in enumerate(digests):
+        matrix[i] = found[digest]
+        if digest not in missing:
+            hits += 1
+    return matrix, hits
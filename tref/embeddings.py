@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from fastembed import TextEmbedding
+from typing import TYPE_CHECKING
 
 from tref.config import EMBED_MODEL
 
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
+
 
 class EmbeddingManager:
     """Compatibility wrapper around fastembed for lightweight CPU embeddings."""
@@ -13,6 +16,8 @@ class EmbeddingManager:
     def __init__(self, model_name: str = EMBED_MODEL) -> None:
         self.model_name = model_name
         if EmbeddingManager._model is None:
+            from fastembed import TextEmbedding
+
             EmbeddingManager._model = TextEmbedding(model_name=self.model_name)
 
     def encode_query(self, query: str):
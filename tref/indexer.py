@@ -2,18 +2,27 @@ from __future__ import annotations
 
 import hashlib
 import json
+import math
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import faiss
 import frontmatter
-import numpy as np
-from fastembed import TextEmbedding
 
 from tref.config import EMBED_MODEL
 from tref.errors import ValidationError
+from tref.kb import LIBRARY_TERMS_FILE, LIBRARY_TERMS_FORMAT, vocab_terms
+
+if TYPE_CHECKING:
+    import numpy as np
+    from fastembed import TextEmbedding
+
+# faiss, numpy, fastembed and the chunk store are imported inside the build
+# functions so validate_kb (and parse workers) start without native libraries.
 
 REQUIRED_FRONTMATTER_KEYS = {
     "library",
@@ -30,6 +39,24 @@ REQUIRED_FRONTMATTER_KEYS = {
     "source_title",
     "alternatives",
 }
+# Learned detection vocabulary: terms found in more than this share of libraries
+# are not discriminative and are dropped (once there are enough libraries to tell).
+LIBRARY_TERMS_MAX_DF_RATIO = 0.2
+LIBRARY_TERMS_MIN_LIBRARIES = 5
+LIBRARY_TERMS_PER_LIBRARY = 400
+# Below the hint weight (2) so one generic word like "args" or "start" cannot meet detection's min_score.
+LIBRARY_TERM_MAX_WEIGHT = 1.0
+# Semantic routing: at most this many unit-norm centroids per library/version.
+MAX_CENTROIDS = 16
+
+INDEX_TYPES = ("flat", "hnsw", "ivfpq")
+DEFAULT_INDEX_PARAMS: dict[str, dict[str, int]] = {
+    "flat": {},
+    "hnsw": {"m": 32, "ef_construction": 200, "ef_search": 64},
+    "ivfpq": {"nlist": 256, "nprobe": 16, "pq_m": 16, "pq_nbits": 8},
+}
+ANN_REPORT_K = 10
+ANN_REPORT_MAX_QUERIES = 200
 
 SCHEMA_V2_REQUIRED_HEADINGS = {
     "Signature",
@@ -162,24 +189,262 @@ def _parse_markdown(doc_path: Path, kb_root: Path) -> list[dict[str, Any]]:
     return chunks
 
 
+def _resolve_index_params(index_type: str, index_params: dict[str, int] | None) -> dict[str, int]:
+    if index_type not in INDEX_TYPES:
+        raise ValidationError("INDEX_TYPE_INVALID", f"Unknown index type '{index_type}'; expected one of {list(INDEX_TYPES)}")
+    params = dict(DEFAULT_INDEX_PARAMS[index_type])
+    for key, value in (index_params or {}).items():
+        if value is None:
+            continue
+        if key not in params:
+            raise ValidationError("INDEX_PARAM_INVALID", f"Parameter '{key}' does not apply to index type '{index_type}'")
+        params[key] = int(value)
+    return params
+
+
+def _make_ann_index(matrix: np.ndarray, index_type: str, params: dict[str, int]) -> tuple[Any, str, dict[str, int]]:
+    import faiss
+
+    count, dim = matrix.shape
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = params["ef_construction"]
+        index.hnsw.efSearch = params["ef_search"]
+        index.add(matrix)
+        return index, "hnsw", params
+    if index_type == "ivfpq":
+        # k-means needs at least as many training points as centroids; shrink to what the data supports.
+        nlist = max(1, min(params["nlist"], count // 39 or 1))
+        pq_m = max(d for d in range(1, min(params["pq_m"], dim) + 1) if dim % d == 0)
+        pq_nbits = min(params["pq_nbits"], max(0, count.bit_length() - 1))
+        if pq_nbits < 1:
+            return _make_ann_index(matrix, "flat", {})
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT)
+        index.train(matrix)
+        index.add(matrix)
+        index.nprobe = min(params["nprobe"], nlist)
+        return index, "ivfpq", {**params, "nlist": nlist, "pq_m": pq_m, "pq_nbits": pq_nbits, "nprobe": index.nprobe}
+    index = faiss.IndexFlatIP(dim)
+    index.add(matrix)
+    return index, "flat", {}
+
+
+def _ann_report(index: Any, matrix: np.ndarray) -> dict[str, Any]:
+    """Recall@k and per-query latency of `index` against an exact flat scan of the same vectors."""
+    import faiss
+    import numpy as np
+
+    count = matrix.shape[0]
+    k = min(ANN_REPORT_K, count)
+    step = max(1, count // ANN_REPORT_MAX_QUERIES)
+    queries = np.ascontiguousarray(matrix[::step][:ANN_REPORT_MAX_QUERIES])
+
+    exact = faiss.IndexFlatIP(matrix.shape[1])
+    exact.add(matrix)
+    start = time.perf_counter()
+    _scores, truth = exact.search(queries, k)
+    flat_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    start = time.perf_counter()
+    _scores, approx = index.search(queries, k)
+    ann_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    found = sum(len(set(t.tolist()) & set(a.tolist())) for t, a in zip(truth, approx, strict=True))
+    return {
+        "k": k,
+        "queries": int(len(queries)),
+        "recall_at_k": round(found / float(k * len(queries)), 4),
+        "flat_ms_per_query": round(flat_ms, 4),
+        "ann_ms_per_query": round(ann_ms, 4),
+    }
+
+
+def _parse_markdown_task(task: tuple[Path, Path]) -> tuple[list[dict[str, Any]] | None, str | None]:
+    doc_path, kb_root = task
+    try:
+        return _parse_markdown(doc_path, kb_root=kb_root), None
+    except Exception as exc:
+        return None, str(exc)
+
+
+def _parse_documents(
+    doc_paths: list[Path],
+    kb_root: Path,
+    pool: ProcessPoolExecutor | None = None,
+    jobs: int = 1,
+) -> list[tuple[list[dict[str, Any]] | None, str | None]]:
+    """Parse `doc_paths` in order, returning (chunks, None) or (None, error message) per file.
+
+    `jobs` is the worker count `pool` was created with; it sizes the batches sent to each worker.
+    """
+    tasks = [(doc_path, kb_root) for doc_path in doc_paths]
+    if pool is None or len(tasks) < 2:
+        return [_parse_markdown_task(task) for task in tasks]
+    return list(pool.map(_parse_markdown_task, tasks, chunksize=max(1, len(tasks) // (max(1, jobs) * 4))))
+
+
+def _parse_pool(jobs: int) -> ProcessPoolExecutor | nullcontext[None]:
+    return ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else nullcontext()
+
+
+def _chunk_key(chunk: dict[str, Any]) -> str:
+    return f"{chunk['id']}|{chunk['source_doc_hash']}"
+
+
+def _build_hash(chunks: list[dict[str, Any]]) -> str:
+    return _sha256_text("\n".join(_chunk_key(chunk) for chunk in chunks))
+
+
+def _load_previous_vectors(output_dir: Path, model_name: str) -> dict[str, np.ndarray]:
+    """Map chunk key -> stored (already normalized) vector from an existing index, when exactly recoverable."""
+    meta_path = output_dir / "meta.json"
+    index_path = output_dir / "index.faiss"
+    chunks_path = output_dir / "chunks.jsonl"
+    if not (meta_path.exists() and index_path.exists() and chunks_path.exists()):
+        return {}
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        # IVF-PQ only stores lossy codes; reusing them would not match a full rebuild.
+        if meta.get("embedding_model") != model_name or meta.get("index_type", "flat") not in {"flat", "hnsw"}:
+            return {}
+        import faiss
+
+        index = faiss.read_index(str(index_path))
+        vectors = index.reconstruct_n(0, index.ntotal)
+        with chunks_path.open("r", encoding="utf-8") as fh:
+            keys = [_chunk_key(json.loads(line)) for line in fh]
+    except Exception:
+        return {}
+    if len(keys) != len(vectors):
+        return {}
+    return {key: vectors[i] for i, key in enumerate(keys)}
+
+
+def _embed_chunks(
+    chunks: list[dict[str, Any]],
+    embedder: TextEmbedding,
+    reuse: dict[str, np.ndarray] | None = None,
+    model_name: str = EMBED_MODEL,
+) -> tuple[np.ndarray, int]:
+    import numpy as np
+
+    from tref.embedcache import embed_texts
+
+    reuse = reuse or {}
+    missing = [i for i, chunk in enumerate(chunks) if _chunk_key(chunk) not in reuse]
+    fresh: np.ndarray | None = None
+    if missing:
+        fresh, _cached = embed_texts(embedder, [chunks[i]["text"] for i in missing], model_name)
+        if len(missing) == len(chunks):
+            return fresh, 0
+
+    # Reused rows are copied as stored: re-normalizing them could shift the last bits.
+    dim = fresh.shape[1] if fresh is not None else len(next(iter(reuse.values())))
+    matrix = np.empty((len(chunks), dim), dtype="float32")
+    for row, i in enumerate(missing):
+        matrix[i] = fresh[row]
+    for i, chunk in enumerate(chunks):
+        vec = reuse.get(_chunk_key(chunk))
+        if vec is not None:
+            matrix[i] = vec
+    return matrix, len(chunks) - len(missing)
+
+
+def _unchanged_meta(
+    output_dir: Path,
+    chunks: list[dict[str, Any]],
+    model_name: str,
+    kb_commit: str,
+    index_type: str,
+    index_params: dict[str, int] | None,
+) -> dict[str, Any] | None:
+    """Return the existing meta.json when a rebuild of `output_dir` would reproduce it."""
+    meta_path = output_dir / "meta.json"
+    if not (meta_path.exists() and (output_dir / "index.faiss").exists() and (output_dir / "chunks.jsonl").exists()):
+        return None
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    requested_type = meta.get("requested_index_type", meta.get("index_type", "flat"))
+    requested_params = meta.get("requested_index_params", meta.get("index_params", {}))
+    if (
+        meta.get("build_hash") != _build_hash(chunks)
+        or meta.get("embedding_model") != model_name
+        or requested_type != index_type
+        or requested_params != _resolve_index_params(index_type, index_params)
+    ):
+        return None
+    # Chunk metadata (signature, aliases, ...) can change without touching the document body.
+    with (output_dir / "chunks.jsonl").open("r", encoding="utf-8") as fh:
+        previous = [json.loads(line) for line in fh]
+    if previous != json.loads(json.dumps(chunks, ensure_ascii=False)):
+        return None
+    from tref.chunkstore import CHUNK_STORE_FILE, write_chunk_store
+    from tref.routing import CENTROIDS_FILE
+
+    if not (output_dir / CHUNK_STORE_FILE).exists():
+        write_chunk_store(chunks, output_dir / CHUNK_STORE_FILE)
+    if not (output_dir / CENTROIDS_FILE).exists():
+        return None
+    if meta.get("kb_commit") != kb_commit:
+        meta["kb_commit"] = kb_commit
+        meta_path.write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+def _write_centroids(chunks: list[dict[str, Any]], matrix: np.ndarray, output_dir: Path) -> int:
+    """Write per-item mean vectors (k-means reduced to MAX_CENTROIDS) used to route queries to this index."""
+    import faiss
+    import numpy as np
+
+    from tref.routing import CENTROIDS_FILE
+
+    rows_by_item: dict[str, list[int]] = {}
+    for row, chunk in enumerate(chunks):
+        rows_by_item.setdefault(str(chunk["item"]), []).append(row)
+    centroids = np.vstack([matrix[rows].mean(axis=0) for rows in rows_by_item.values()]).astype("float32")
+    if len(centroids) > MAX_CENTROIDS:
+        kmeans = faiss.Kmeans(
+            centroids.shape[1], MAX_CENTROIDS, niter=20, seed=1234, spherical=True, min_points_per_centroid=1
+        )
+        kmeans.train(centroids)
+        centroids = np.ascontiguousarray(kmeans.centroids, dtype="float32")
+    faiss.normalize_L2(centroids)
+    tmp = output_dir / (CENTROIDS_FILE + ".tmp")
+    with tmp.open("wb") as fh:
+        np.save(fh, centroids)
+    tmp.replace(output_dir / CENTROIDS_FILE)
+    return int(len(centroids))
+
+
 def _build_faiss_index(
     chunks: list[dict[str, Any]],
     output_dir: Path,
     model_name: str = EMBED_MODEL,
     kb_commit: str = "unknown",
     embedder: TextEmbedding | None = None,
+    index_type: str = "flat",
+    index_params: dict[str, int] | None = None,
+    matrix: np.ndarray | None = None,
 ) -> dict[str, Any]:
+    import faiss
+
+    from tref.chunkstore import CHUNK_STORE_FILE, write_chunk_store
+
     if not chunks:
         raise ValidationError("INDEX_EMPTY", "No chunks found to index")
+    params = _resolve_index_params(index_type, index_params)
 
-    if embedder is None:
-        embedder = TextEmbedding(model_name=model_name)
-    vectors = list(embedder.embed([chunk["text"] for chunk in chunks]))
-    matrix = np.array(vectors, dtype="float32")
-    faiss.normalize_L2(matrix)
+    if matrix is None:
+        if embedder is None:
+            from fastembed import TextEmbedding
 
-    index = faiss.IndexFlatIP(matrix.shape[1])
-    index.add(matrix)
+            embedder = TextEmbedding(model_name=model_name)
+        matrix, _reused = _embed_chunks(chunks, embedder, model_name=model_name)
+
+    index, built_type, built_params = _make_ann_index(matrix, index_type, params)
+    ann_report = _ann_report(index, matrix) if built_type != "flat" else None
 
     output_dir.mkdir(parents=True, exist_ok=True)
     faiss.write_index(index, str(output_dir / "index.faiss"))
@@ -187,9 +452,10 @@ def _build_faiss_index(
     with (output_dir / "chunks.jsonl").open("w", encoding="utf-8") as fh:
         for chunk in chunks:
             fh.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+    write_chunk_store(chunks, output_dir / CHUNK_STORE_FILE)
+    centroid_count = _write_centroids(chunks, matrix, output_dir)
 
-    joined_ids = "\n".join(chunk["id"] + "|" + chunk["source_doc_hash"] for chunk in chunks)
-    build_hash = _sha256_text(joined_ids)
+    build_hash = _build_hash(chunks)
 
     now = datetime.now(tz=UTC)
     source_date_epoch = os.getenv("SOURCE_DATE_EPOCH")
@@ -208,11 +474,72 @@ def _build_faiss_index(
         "kb_commit": kb_commit,
         "build_hash": build_hash,
         "builder_version": "tref-0.3.0",
+        "index_type": built_type,
+        "index_params": built_params,
+        "centroids": centroid_count,
     }
+    if built_type != index_type:
+        meta["requested_index_type"] = index_type
+    if built_params != params:
+        meta["requested_index_params"] = params
+    if ann_report is not None:
+        meta["ann_report"] = ann_report
     (output_dir / "meta.json").write_text(json.dumps(meta, indent=2), encoding="utf-8")
     return meta
 
 
+def _build_merged_index(
+    output_root: Path,
+    parts: list[tuple[str, str, np.ndarray, str]],
+    model_name: str,
+    index_type: str,
+    index_params: dict[str, int] | None,
+) -> dict[str, Any]:
+    """Write one FAISS index over every library/version, with the row range each one occupies.
+
+    Retrievers for a listed library/version search it through an IDSelectorRange, so a
+    service can keep a single warm index for the whole KB.
+    """
+    import faiss
+    import numpy as np
+
+    from tref.retrieval import MERGED_INDEX_DIR
+
+    ranges: dict[str, dict[str, Any]] = {}
+    start = 0
+    for library, version, matrix, build_hash in parts:
+        ranges[f"{library}/{version}"] = {"start": start, "end": start + len(matrix), "build_hash": build_hash}
+        start += len(matrix)
+    matrix = np.ascontiguousarray(np.vstack([part[2] for part in parts]), dtype="float32")
+    index, built_type, built_params = _make_ann_index(matrix, index_type, _resolve_index_params(index_type, index_params))
+
+    # The index file name is derived from its contents and meta.json is swapped in last,
+    # so a reader never pairs a new index with old row ranges.
+    merged_dir = output_root / MERGED_INDEX_DIR
+    merged_dir.mkdir(parents=True, exist_ok=True)
+    layout = "\n".join(f"{key}|{entry['start']}|{entry['end']}|{entry['build_hash']}" for key, entry in ranges.items())
+    build_hash = _sha256_text(f"{model_name}|{built_type}|{built_params}|{layout}")
+    index_file = f"index-{_sha256_text(f'{built_type}|{built_params}|{layout}')[:16]}.faiss"
+    faiss.write_index(index, str(merged_dir / f"{index_file}.tmp"))
+    (merged_dir / f"{index_file}.tmp").replace(merged_dir / index_file)
+    meta = {
+        "embedding_model": model_name,
+        "dimension": int(matrix.shape[1]),
+        "count": int(matrix.shape[0]),
+        "index_type": built_type,
+        "index_params": built_params,
+        "index_file": index_file,
+        "build_hash": build_hash,
+        "ranges": ranges,
+    }
+    (merged_dir / "meta.json.tmp").write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    (merged_dir / "meta.json.tmp").replace(merged_dir / "meta.json")
+    for stale in merged_dir.glob("index-*.faiss"):
+        if stale.name != index_file:
+            stale.unlink(missing_ok=True)
+    return {"count": meta["count"], "index_type": built_type, "indexes": len(ranges)}
+
+
 def _detect_kb_commit(kb_root: Path) -> str:
     env_commit = os.getenv("TREF_KB_COMMIT")
     if env_commit:
@@ -223,10 +550,49 @@ def _detect_kb_commit(kb_root: Path) -> str:
     return "unknown"
 
 
-def build_indexes(kb_root: Path, output_root: Path) -> dict[str, Any]:
+def _library_term_table(terms_by_library: dict[str, set[str]]) -> dict[str, Any]:
+    """Inverted term -> [[library, weight], ...] table with IDF-style weights.
+
+    A term unique to one library weighs LIBRARY_TERM_MAX_WEIGHT, half a
+    LIBRARY_HINTS hit, and the weight falls with the number of libraries
+    sharing it; vocabulary alone needs two distinctive terms to detect a library.
+    """
+    total = len(terms_by_library)
+    names = {library.lower() for library in terms_by_library}
+    df: dict[str, int] = {}
+    for terms in terms_by_library.values():
+        for term in terms:
+            df[term] = df.get(term, 0) + 1
+    postings: dict[str, list[list[Any]]] = {}
+    for library in sorted(terms_by_library):
+        weighted: list[tuple[float, str]] = []
+        for term in terms_by_library[library]:
+            if term in names:
+                continue  # library names are matched (and weighted) separately
+            if total >= LIBRARY_TERMS_MIN_LIBRARIES and df[term] / total > LIBRARY_TERMS_MAX_DF_RATIO:
+                continue
+            weight = LIBRARY_TERM_MAX_WEIGHT * math.log((total + 1) / df[term]) / math.log(total + 1)
+            weighted.append((round(weight, 3), term))
+        weighted.sort(key=lambda entry: (-entry[0], entry[1]))
+        for weight, term in weighted[:LIBRARY_TERMS_PER_LIBRARY]:
+            postings.setdefault(term, []).append([library, weight])
+    return {"format": LIBRARY_TERMS_FORMAT, "libraries": total, "terms": dict(sorted(postings.items()))}
+
+
+def build_indexes(
+    kb_root: Path,
+    output_root: Path,
+    index_type: str = "flat",
+    index_params: dict[str, int] | None = None,
+    incremental: bool = False,
+    jobs: int = 1,
+    merged: bool = False,
+) -> dict[str, Any]:
     kb_root = kb_root.expanduser().resolve()
     output_root = output_root.expanduser().resolve()
 
+    from fastembed import TextEmbedding
+
     kb_commit = _detect_kb_commit(kb_root)
     embedder = TextEmbedding(model_name=EMBED_MODEL)
     summary: dict[str, Any] = {
@@ -234,7 +600,20 @@ def build_indexes(kb_root: Path, output_root: Path) -> dict[str, Any]:
         "built_on": datetime.now(tz=UTC).isoformat(),
         "kb_commit": kb_commit,
         "builder_version": "tref-0.3.0",
+        "index_type": index_type,
     }
+    terms_by_library: dict[str, set[str]] = {}
+    merged_parts: list[tuple[str, str, np.ndarray, str]] = []
+
+    # Parse the whole KB up front so a process pool sees every document at once.
+    all_doc_paths = [
+        doc_path
+        for library_dir in sorted(p for p in kb_root.iterdir() if p.is_dir())
+        for version_dir in sorted(p for p in library_dir.iterdir() if p.is_dir())
+        for doc_path in sorted(version_dir.rglob("*.md"))
+    ]
+    with _parse_pool(jobs) as pool:
+        parsed = dict(zip(all_doc_paths, _parse_documents(all_doc_paths, kb_root, pool, jobs)))
 
     for library_dir in sorted(p for p in kb_root.iterdir() if p.is_dir()):
         library = library_dir.name
@@ -248,39 +627,77 @@ def build_indexes(kb_root: Path, output_root: Path) -> dict[str, Any]:
                 continue
             chunks: list[dict[str, Any]] = []
             for doc_path in doc_paths:
-                chunks.extend(_parse_markdown(doc_path, kb_root=kb_root))
-
-            meta = _build_faiss_index(
-                chunks,
-                output_root / library / version,
-                kb_commit=kb_commit,
-                embedder=embedder,
-            )
+                doc_chunks, error = parsed[doc_path]
+                if error is not None:
+                    # Re-raise in this process so the caller sees the original exception.
+                    _parse_markdown(doc_path, kb_root=kb_root)
+                chunks.extend(doc_chunks or [])
+            library_terms = terms_by_library.setdefault(library, set())
+            for chunk in chunks:
+                fields = [chunk["item"], chunk["signature"], *chunk.get("aliases", []), *chunk.get("keywords", [])]
+                library_terms.update(vocab_terms(" ".join(fields)))
+
+            output_dir = output_root / library / version
+            meta = None
+            matrix = None
+            status: dict[str, Any] = {}
+            if incremental:
+                meta = _unchanged_meta(output_dir, chunks, EMBED_MODEL, kb_commit, index_type, index_params)
+                status = {"status": "unchanged", "reused_vectors": len(chunks), "embedded": 0}
+            if meta is None:
+                reuse = _load_previous_vectors(output_dir, EMBED_MODEL) if incremental else None
+                matrix, reused = _embed_chunks(chunks, embedder, reuse)
+                meta = _build_faiss_index(
+                    chunks,
+                    output_dir,
+                    kb_commit=kb_commit,
+                    embedder=embedder,
+                    index_type=index_type,
+                    index_params=index_params,
+                    matrix=matrix,
+                )
+                status = {"status": "rebuilt", "reused_vectors": reused, "embedded": len(chunks) - reused}
+            if merged:
+                if matrix is None:
+                    matrix, _reused = _embed_chunks(chunks, embedder, _load_previous_vectors(output_dir, EMBED_MODEL))
+                merged_parts.append((library, version, matrix, meta["build_hash"]))
             versions.append(version)
             if version == "latest":
                 latest_from_manifest = "latest"
             summary["libraries"].setdefault(library, {})[version] = {
                 "count": meta["count"],
                 "build_hash": meta["build_hash"],
+                "index_type": meta["index_type"],
             }
+            if "ann_report" in meta:
+                summary["libraries"][library][version]["ann_report"] = meta["ann_report"]
+            if incremental:
+                summary["libraries"][library][version]["incremental"] = status
 
         if versions:
             latest = latest_from_manifest or sorted(v for v in versions if v != "latest")[-1]
             summary["libraries"][library]["versions"] = versions
             summary["libraries"][library]["latest"] = latest
 
+    if merged and merged_parts:
+        summary["merged"] = _build_merged_index(output_root, merged_parts, EMBED_MODEL, index_type, index_params)
+    (output_root / LIBRARY_TERMS_FILE).write_text(
+        json.dumps(_library_term_table(terms_by_library), separators=(",", ":")), encoding="utf-8"
+    )
     (output_root / "_manifest.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
     return summary
 
 
-def validate_kb(kb_root: Path) -> dict[str, Any]:
+def validate_kb(kb_root: Path, jobs: int = 1) -> dict[str, Any]:
     kb_root = kb_root.expanduser().resolve()
     total_docs = 0
     errors: list[str] = []
-    for doc_path in sorted(kb_root.rglob("*.md")):
-        try:
-            _parse_markdown(doc_path, kb_root=kb_root)
+    doc_paths = sorted(kb_root.rglob("*.md"))
+    with _parse_pool(jobs) as pool:
+        results = _parse_documents(doc_paths, kb_root, pool, jobs)
+    for doc_path, (_chunks, error) in zip(doc_paths, results):
+        if error is None:
             total_docs += 1
-        except Exception as exc:
-            errors.append(f"{doc_path}: {exc}")
+        else:
+            errors.append(f"{doc_path}: {error}")
     return {"valid": len(errors) == 0, "docs": total_docs, "errors": errors}
@@ -6,8 +6,6 @@ import time
 from pathlib import Path
 from typing import Any
 
-import httpx
-
 from tref.config import (
     HTTP_MAX_RETRIES,
     HTTP_RETRY_BACKOFF_SECONDS,
@@ -17,9 +15,17 @@ from tref.config import (
     get_kb_manifest_url,
     ensure_dirs,
 )
+from tref.timing import stage
 
 LIBVER_RE = re.compile(r"^(?P<library>[a-zA-Z0-9_.-]+)@(?P<version>[a-zA-Z0-9_.-]+)$")
 WORD_RE = re.compile(r"[a-zA-Z0-9_.-]+")
+LIBRARY_TERMS_FILE = "_library_terms.json"
+# 2: weights capped at 1.0; format-1 files (weights up to 2.0) are ignored until the next build-index.
+LIBRARY_TERMS_FORMAT = 2
+VOCAB_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from get how i in into is it its me my new of on or set "
+    "the this to use using vs what when where which with without you your".split()
+)
 _MANIFEST_MEM_CACHE: dict[str, Any] | None = None
 
 LIBRARY_HINTS: dict[str, tuple[str, ...]] = {
@@ -74,6 +80,16 @@ def split_inline_library_version(query: str) -> tuple[str | None, str | None, st
 
 
 def load_manifest(refresh: bool = False) -> dict[str, Any]:
+    with stage("load_manifest"):
+        return _load_manifest(refresh)
+
+
+def clear_manifest_cache() -> None:
+    global _MANIFEST_MEM_CACHE
+    _MANIFEST_MEM_CACHE = None
+
+
+def _load_manifest(refresh: bool) -> dict[str, Any]:
     global _MANIFEST_MEM_CACHE
     ensure_dirs()
     if _MANIFEST_MEM_CACHE is not None and not refresh:
@@ -83,6 +99,8 @@ def load_manifest(refresh: bool = False) -> dict[str, Any]:
         return _MANIFEST_MEM_CACHE
     last_error: Exception | None = None
     url = get_kb_manifest_url()
+    import httpx
+
     for attempt in range(HTTP_MAX_RETRIES):
         try:
             response = httpx.get(
@@ -120,33 +138,153 @@ def local_versions(library: str, index_root: Path = INDEX_ROOT) -> list[str]:
 
 def available_libraries(index_root: Path = INDEX_ROOT) -> list[str]:
     ensure_dirs()
-    local = [p.name for p in index_root.iterdir() if p.is_dir()]
+    # Underscore-prefixed directories (e.g. the merged index) are build artifacts, not libraries.
+    local = [p.name for p in index_root.iterdir() if p.is_dir() and not p.name.startswith("_")]
     manifest = load_manifest(refresh=False)
     remote = list(manifest.get("libraries", {}).keys())
     return sorted(set(local + remote))
 
 
+def vocab_terms(text: str) -> set[str]:
+    """Lowercased tokens of `text` (plus the parts of dotted/hyphenated ones) used by the learned vocabulary."""
+    terms: set[str] = set()
+    for token in WORD_RE.findall(text.lower()):
+        token = token.strip(".-")
+        parts = [token, *re.split(r"[.-]", token)] if ("." in token or "-" in token) else [token]
+        for part in parts:
+            if len(part) >= 2 and not part.isdigit() and part not in VOCAB_STOPWORDS:
+                terms.add(part)
+    return terms
+
+
+def _load_library_terms(index_root: Path) -> dict[str, list[list[Any]]]:
+    try:
+        data = json.loads((index_root / LIBRARY_TERMS_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != LIBRARY_TERMS_FORMAT:
+        return {}
+    terms = data.get("terms")
+    return terms if isinstance(terms, dict) else {}
+
+
+def _overlapping_matcher(terms: list[str], word_bounded: bool) -> re.Pattern[str] | None:
+    if not terms:
+        return None
+    # Longest alternative first; the lookahead lets matches overlap, so every start position is reported.
+    body = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    if word_bounded:
+        return re.compile(rf"(?=\b({body})\b)")
+    return re.compile(rf"(?=({body}))")
+
+
+class _DetectionIndex:
+    """Term -> library postings for every available library, matched in one pass per query.
+
+    Besides library names and the curated LIBRARY_HINTS, each query token is
+    looked up in the weighted vocabulary that build_indexes learns from item
+    names, signatures, aliases and keywords (`_library_terms.json`).
+    """
+
+    def __init__(self, libraries: list[str], library_terms: dict[str, list[list[Any]]] | None = None) -> None:
+        self.libraries = libraries
+        self.order = {library: i for i, library in enumerate(libraries)}
+        self.name_postings: dict[str, list[str]] = {}
+        self.hint_postings: dict[str, list[str]] = {}
+        for library in libraries:
+            self.name_postings.setdefault(library.lower(), []).append(library)
+            for hint in LIBRARY_HINTS.get(library.lower(), ()):
+                self.hint_postings.setdefault(hint, []).append(library)
+        known = set(libraries)
+        self.vocab: dict[str, list[tuple[str, float]]] = {}
+        for term, postings in (library_terms or {}).items():
+            kept = [(str(library), float(weight)) for library, weight in postings if library in known]
+            if kept:
+                self.vocab[term] = kept
+        self.name_matcher = _overlapping_matcher(list(self.name_postings), word_bounded=True)
+        self.hint_matcher = _overlapping_matcher(list(self.hint_postings), word_bounded=False)
+        # A match only reports the longest term at its position; shorter terms that are
+        # prefixes of it (e.g. "state" / "statement") matched there too.
+        self.name_prefixes = self._prefix_closure(self.name_postings)
+        self.hint_prefixes = self._prefix_closure(self.hint_postings)
+
+    @staticmethod
+    def _prefix_closure(postings: dict[str, list[str]]) -> dict[str, list[str]]:
+        terms = list(postings)
+        return {term: [other for other in terms if term.startswith(other)] for term in terms}
+
+    def candidates(self, query_lower: str) -> list[dict[str, Any]]:
+        scores: dict[str, float] = {}
+        name_hits: set[str] = set()
+        hint_hits: set[str] = set()
+        if self.name_matcher is not None:
+            for match in self.name_matcher.finditer(query_lower):
+                end = match.start() + len(match.group(1))
+                for name in self.name_prefixes[match.group(1)]:
+                    stop = match.start() + len(name)
+                    if stop == end or not (query_lower[stop].isalnum() or query_lower[stop] == "_"):
+                        name_hits.add(name)
+        if self.hint_matcher is not None:
+            for match in self.hint_matcher.finditer(query_lower):
+                hint_hits.update(self.hint_prefixes[match.group(1)])
+
+        for name in name_hits:
+            for library in self.name_postings[name]:
+                scores[library] = scores.get(library, 0) + 10
+        for hint in hint_hits:
+            for library in self.hint_postings[hint]:
+                scores[library] = scores.get(library, 0) + 2
+        vocab_hits: dict[str, list[tuple[float, str]]] = {}
+        if self.vocab:
+            for term in vocab_terms(query_lower):
+                for library, weight in self.vocab.get(term, ()):
+                    scores[library] = scores.get(library, 0) + weight
+                    vocab_hits.setdefault(library, []).append((weight, term))
+        for library, score in scores.items():
+            scores[library] = round(score, 2)
+
+        scored: list[dict[str, Any]] = []
+        for library in sorted(scores, key=lambda lib: (-scores[lib], self.order[lib])):
+            reasons = ["library_name"] if library.lower() in name_hits else []
+            reasons.extend(hint for hint in LIBRARY_HINTS.get(library.lower(), ()) if hint in hint_hits)
+            hits = sorted(vocab_hits.get(library, ()), key=lambda hit: (-hit[0], hit[1]))
+            reasons.extend(f"vocab:{term}" for _weight, term in hits)
+            scored.append({"library": library, "score": scores[library], "reasons": reasons})
+        scored.extend(
+            {"library": library, "score": 0, "reasons": []} for library in self.libraries if library not in scores
+        )
+        return scored
+
+
+_DETECTION_INDEX_CACHE: dict[str, tuple[tuple[Any, ...], _DetectionIndex]] = {}
+
+
+def _stat_stamp(path: Path) -> tuple[int, int, int] | None:
+    # Inode and size too: release archives zero mtimes, so a swapped-in file can keep the old one.
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _detection_index(index_root: Path) -> _DetectionIndex:
+    # Rebuilt only when the index root listing, the learned vocabulary, the cached
+    # manifest or the in-memory manifest changes.
+    terms_path = index_root / LIBRARY_TERMS_FILE
+    state = (_stat_stamp(index_root), _stat_stamp(terms_path), _stat_stamp(MANIFEST_CACHE), id(_MANIFEST_MEM_CACHE))
+    key = str(index_root)
+    cached = _DETECTION_INDEX_CACHE.get(key)
+    if cached is not None and cached[0] == state:
+        return cached[1]
+    detection = _DetectionIndex(available_libraries(index_root=index_root), _load_library_terms(index_root))
+    state = (_stat_stamp(index_root), _stat_stamp(terms_path), _stat_stamp(MANIFEST_CACHE), id(_MANIFEST_MEM_CACHE))
+    _DETECTION_INDEX_CACHE[key] = (state, detection)
+    return detection
+
+
 def detect_library_candidates(query: str, index_root: Path = INDEX_ROOT) -> list[dict[str, Any]]:
-    query_lower = query.lower()
-    tokens = set(WORD_RE.findall(query_lower))
-    scored: list[dict[str, Any]] = []
-
-    for library in available_libraries(index_root=index_root):
-        score = 0
-        reasons: list[str] = []
-        if re.search(rf"\b{re.escape(library.lower())}\b", query_lower):
-            score += 10
-            reasons.append("library_name")
-
-        for hint in LIBRARY_HINTS.get(library.lower(), ()):  # heuristic hints
-            if hint in query_lower or hint in tokens:
-                score += 2
-                reasons.append(hint)
-
-        scored.append({"library": library, "score": score, "reasons": reasons})
-
-    scored.sort(key=lambda item: item["score"], reverse=True)
-    return scored
+    return _detection_index(index_root).candidates(query.lower())
 
 
 def detect_library_from_query(
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+LOCK_POLL_SECONDS = 0.1
+
+
+def _try_lock(fh: IO[bytes]) -> bool:
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fh: IO[bytes]) -> None:
+    try:
+        if os.name == "nt":
+            import msvcrt
+
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float | None = 0.0) -> Iterator[bool]:
+    """Exclusive advisory lock on `path`, yielding whether it was acquired within `timeout` seconds.
+
+    `timeout=None` waits indefinitely. The OS drops the lock when its holder
+    exits, so a crashed process never leaves it stuck.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with path.open("a+b") as fh:
+        acquired = _try_lock(fh)
+        while not acquired and (deadline is None or time.monotonic() < deadline):
+            time.sleep(LOCK_POLL_SECONDS)
+            acquired = _try_lock(fh)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                _unlock(fh)
@@ -23,6 +23,10 @@ class SearchResult:
         data["doc_url"] = self.source_url
         return data
 
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SearchResult":
+        return cls(**{name: data[name] for name in cls.__dataclass_fields__ if name in data})
+
 
 @dataclass(slots=True)
 class AskResponse:
@@ -58,3 +62,9 @@ class AskResponse:
             "warnings": self.warnings or [],
             "full_document": self.full_document,
         }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "AskResponse":
+        fields = {name: data[name] for name in cls.__dataclass_fields__ if name in data}
+        fields["results"] = [SearchResult.from_dict(result) for result in data.get("results") or []]
+        return cls(**fields)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from tref.config import RESPONSE_CACHE_FILE, RESPONSE_CACHE_MAX_MB
+from tref.sqlitecache import install_byte_counter, stored_bytes
+
+MEMORY_ENTRIES = 512
+EVICT_TARGET_RATIO = 0.9
+SQLITE_BUSY_TIMEOUT_SECONDS = 10.0
+
+_BUILD_HASHES: dict[str, tuple[tuple[int, int, int], str | None]] = {}
+
+
+def index_build_hash(index_dir: Path) -> str | None:
+    """`build_hash` from `index_dir/meta.json`, re-read only when the file changes."""
+    meta_path = index_dir / "meta.json"
+    try:
+        st = meta_path.stat()
+    except OSError:
+        return None
+    # Release archives zero mtimes, so a swapped-in meta.json can carry the old mtime; inode and size catch it.
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+    key = str(meta_path)
+    cached = _BUILD_HASHES.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        build_hash = json.loads(meta_path.read_text(encoding="utf-8")).get("build_hash")
+    except (OSError, ValueError):
+        return None
+    _BUILD_HASHES[key] = (stamp, build_hash)
+    if cached is not None and cached[1] and cached[1] != build_hash:
+        ResponseCache.drop_build(cached[1])
+    return build_hash
+
+
+def response_key(build_hash: str, index_dir: Path, query: str, params: dict[str, Any]) -> str:
+    material = json.dumps(
+        {"build_hash": build_hash, "index_dir": str(index_dir), "query": query, "params": params},
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache of serialized `ask` responses keyed by index build hash and query parameters.
+
+    The memory tier is a small LRU of JSON strings; the disk tier is a SQLite
+    file under CACHE_ROOT shared by every process, trimmed least-recently-used
+    first once it exceeds its cap. Every failure degrades to a cache miss.
+    """
+
+    _instances: dict[Path, "ResponseCache"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, path: Path = RESPONSE_CACHE_FILE, max_bytes: int = RESPONSE_CACHE_MAX_MB * 1024 * 1024) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        # key -> (build_hash, serialized response)
+        self._memory: "OrderedDict[str, tuple[str | None, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._broken = False
+        self._suspended = False
+
+    @classmethod
+    def shared(cls, path: Path = RESPONSE_CACHE_FILE) -> "ResponseCache":
+        with cls._instances_lock:
+            cache = cls._instances.get(path)
+            if cache is None:
+                cache = cls._instances[path] = cls(path)
+            return cache
+
+    @property
+    def enabled(self) -> bool:
+        return not self._suspended
+
+    @contextmanager
+    def suspended(self) -> Iterator[None]:
+        """Bypass both tiers inside the block: lookups miss and nothing is stored."""
+        with self._lock:
+            previous, self._suspended = self._suspended, True
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._suspended = previous
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._conn is not None or self._broken or self.max_bytes <= 0:
+            return self._conn
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=SQLITE_BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            conn.commit()
+            install_byte_counter(conn, "responses", "payload")
+        except (sqlite3.Error, OSError):
+            self._broken = True
+            return None
+        self._conn = conn
+        return conn
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            if self._suspended:
+                return None
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                return json.loads(entry[1])
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT payload FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+            except sqlite3.Error:
+                return None
+            self._remember(key, None, row[0])
+            return json.loads(row[0])
+
+    def put(self, key: str, payload: dict[str, Any], build_hash: str | None = None) -> None:
+        text = json.dumps(payload)
+        with self._lock:
+            if self._suspended:
+                return
+            self._remember(key, build_hash, text)
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT INTO responses VALUES (?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "payload = excluded.payload, last_used = excluded.last_used",
+                    (key, text, time.time()),
+                )
+                conn.commit()
+                self._evict(conn)
+            except sqlite3.Error:
+                return
+
+    def _remember(self, key: str, build_hash: str | None, text: str) -> None:
+        if build_hash is None and key in self._memory:
+            build_hash = self._memory[key][0]
+        self._memory[key] = (build_hash, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > MEMORY_ENTRIES:
+            self._memory.popitem(last=False)
+
+    @classmethod
+    def drop_build(cls, build_hash: str) -> None:
+        """Evict memory-tier entries of a build that has been replaced; its disk rows age out by LRU."""
+        with cls._instances_lock:
+            caches = list(cls._instances.values())
+        for cache in caches:
+            with cache._lock:
+                for key in [k for k, (h, _text) in cache._memory.items() if h == build_hash]:
+                    del cache._memory[key]
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        total = stored_bytes(conn, "responses")
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TARGET_RATIO)
+        victims: list[tuple[int]] = []
+        for rowid, size in conn.execute("SELECT rowid, LENGTH(payload) FROM responses ORDER BY last_used, rowid"):
+            if total <= target:
+                break
+            total -= int(size)
+            victims.append((rowid,))
+        conn.executemany("DELETE FROM responses WHERE rowid = ?", victims)
+        conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("DELETE FROM responses")
+                conn.commit()
+            except sqlite3.Error:
+                return
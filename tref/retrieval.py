@@ -2,24 +2,39 @@ from __future__ import annotations
 
 import json
 import os
-import re
 import threading
 from collections import OrderedDict
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import faiss
 import numpy as np
-from fastembed import TextEmbedding
 
-from tref.config import EMBED_MODEL
+from tref.chunkstore import TOKEN_RE, ChunkStore
+from tref.config import (
+    EMBED_MODEL,
+    HNSW_EF_SEARCH,
+    IVF_NPROBE,
+    QUERY_CACHE_FILE,
+    QUERY_CACHE_MAX_MB,
+    RETRIEVER_CACHE_MB,
+    RETRIEVER_PINNED,
+    USE_MERGED_INDEX,
+)
+from tref.embedcache import EmbeddingCache, embed_texts
 from tref.models import SearchResult
+from tref.timing import stage
+
+if TYPE_CHECKING:
+    from fastembed import TextEmbedding
 
-TOKEN_RE = re.compile(r"[a-zA-Z0-9_.-]+")
-MAX_RETRIEVER_CACHE = 8
 MAX_QUERY_VECTOR_CACHE = 256
+MERGED_INDEX_DIR = "_merged"
 
 
 def _build_embedder(model_name: str = EMBED_MODEL) -> TextEmbedding:
+    # fastembed pulls in onnxruntime and tokenizers; only load it when a query needs embedding.
+    from fastembed import TextEmbedding
+
     try:
         return TextEmbedding(model_name=model_name, providers=["CUDAExecutionProvider", "CPUExecutionProvider"])
     except TypeError:
@@ -28,6 +43,36 @@ def _build_embedder(model_name: str = EMBED_MODEL) -> TextEmbedding:
         return TextEmbedding(model_name=model_name)
 
 
+def _file_stamp(path: Path) -> tuple[int, int, int] | None:
+    """Identity of a file that changes when it is rewritten or swapped, even if its mtime is preserved."""
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _faiss_index_bytes(index: object) -> int:
+    """Approximate resident size of a FAISS index: stored vectors/codes plus graph or list overhead."""
+    import faiss
+
+    n, d = int(index.ntotal), int(index.d)
+    if isinstance(index, faiss.IndexHNSW):
+        hnsw = index.hnsw
+        return n * d * 4 + int(hnsw.neighbors.size()) * 4 + int(hnsw.levels.size()) * 4 + int(hnsw.offsets.size()) * 8
+    if isinstance(index, faiss.IndexIVF):
+        size = n * (int(index.code_size) + 8) + int(index.nlist) * d * 4
+        if isinstance(index, faiss.IndexIVFPQ):
+            size += int(index.pq.ksub) * d * 4
+        return size
+    return n * d * 4
+
+
+def normalize_query(query: str) -> str:
+    # Whitespace runs do not change the tokenizer's output, so they should not split cache entries.
+    return " ".join(query.split())
+
+
 def _tokenize(text: str) -> set[str]:
     return set(TOKEN_RE.findall(text.lower()))
 
@@ -55,73 +100,55 @@ def infer_query_intent(query: str) -> str:
 
 class Retriever:
     _embedder: TextEmbedding | None = None
+    # LRU of loaded retrievers, bounded by their approximate bytes rather than by count.
     _cache: "OrderedDict[str, Retriever]" = OrderedDict()
+    _cache_bytes = 0
+    _cache_max_bytes = RETRIEVER_CACHE_MB * 1024 * 1024
+    _cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "reloads": 0}
+    _pinned: set[str] = set(RETRIEVER_PINNED)
     _lock = threading.Lock()
+    _embedder_lock = threading.Lock()
     _query_vector_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+    _merged_indexes: dict[str, tuple[tuple[int, int, int], object, dict]] = {}
+    _merged_lock = threading.Lock()
 
     def __init__(self, index_dir: Path, model_name: str = EMBED_MODEL):
+        import faiss
+
         self.index_dir = index_dir
-        self.index = faiss.read_index(str(index_dir / "index.faiss"))
+        meta_path = index_dir / "meta.json"
+        # Stamped before reading so a swap that lands mid-load is caught on the next lookup.
+        self.meta_stamp = _file_stamp(meta_path)
+        self.index_meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+        self.store = ChunkStore.open(index_dir)
+        self._section_boost_cache: dict[str, np.ndarray] = {}
+
+        # Prefer the shared merged index (restricted to this directory's row range) when it covers this build.
+        self.id_offset = 0
+        self._id_selector = None
+        self._filter_ratio = 1
+        merged = self._merged_view() if USE_MERGED_INDEX else None
+        if merged is not None:
+            self.index, start, end, index_meta = merged
+            self.id_offset = start
+            self._id_selector = faiss.IDSelectorRange(start, end)
+            self._filter_ratio = max(1, -(-int(self.index.ntotal) // max(1, end - start)))
+        else:
+            self.index = faiss.read_index(str(index_dir / "index.faiss"))
+            index_meta = self.index_meta
         try:
             faiss.omp_set_num_threads(max(1, os.cpu_count() or 1))
         except Exception:
             pass
 
-        self.chunks = []
-        self._item_to_indices: dict[str, list[int]] = {}
-        self._item_metadata: dict[str, dict[str, object]] = {}
-        meta_path = index_dir / "meta.json"
-        self.index_meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
-        with (index_dir / "chunks.jsonl").open("r", encoding="utf-8") as fh:
-            for line in fh:
-                raw = json.loads(line)
-                alias_text = " ".join(raw.get("aliases", []))
-                intent_text = raw.get("intent", "")
-                query_text = f"{raw['item']} {raw['signature']} {alias_text} {intent_text} {raw['text']}"
-                chunk_id = str(raw.get("id", ""))
-                try:
-                    order = int(chunk_id.rsplit("::", 1)[-1])
-                except Exception:
-                    order = 0
-                chunk = {
-                    "id": chunk_id,
-                    "order": order,
-                    "text": raw["text"],
-                    "citation": raw["citation"],
-                    "library": raw["library"],
-                    "version": raw["version"],
-                    "item": raw["item"],
-                    "type": raw.get("type", ""),
-                    "signature": raw["signature"],
-                    "section": raw.get("section", ""),
-                    "source_url": raw.get("source_url"),
-                    "source_title": raw.get("source_title"),
-                    "source_last_updated": raw.get("source_last_updated"),
-                    "alternatives": raw.get("alternatives", []),
-                    "query_text": query_text,
-                    "query_tokens": _tokenize(query_text),
-                }
-                idx = len(self.chunks)
-                self.chunks.append(chunk)
-                item = str(chunk["item"])
-                self._item_to_indices.setdefault(item, []).append(idx)
-                if item not in self._item_metadata:
-                    self._item_metadata[item] = {
-                        "library": chunk.get("library"),
-                        "version": chunk.get("version"),
-                        "item": item,
-                        "signature": chunk.get("signature"),
-                        "alternatives": list(chunk.get("alternatives") or []),
-                        "source_url": chunk.get("source_url"),
-                        "source_title": chunk.get("source_title"),
-                        "source_last_updated": chunk.get("source_last_updated"),
-                    }
-
-        for item, idxs in self._item_to_indices.items():
-            idxs.sort(key=lambda i: int(self.chunks[i].get("order", 0)))
-
-        if Retriever._embedder is None:
-            Retriever._embedder = _build_embedder(model_name=model_name)
+        # The merged index is shared by every retriever it covers, so only a private index counts here.
+        self.approx_bytes = self.store.nbytes + (0 if merged is not None else _faiss_index_bytes(self.index))
+
+        self.index_type = str(index_meta.get("index_type") or "flat")
+        built_params = dict(index_meta.get("index_params") or {})
+        self.ef_search = HNSW_EF_SEARCH or int(built_params.get("ef_search") or 0)
+        self.nprobe = IVF_NPROBE or int(built_params.get("nprobe") or 0)
+
 
     @classmethod
     def get(cls, index_dir: Path, model_name: str = EMBED_MODEL) -> "Retriever":
@@ -129,14 +156,149 @@ class Retriever:
         with cls._lock:
             inst = cls._cache.get(key)
             if inst is not None:
-                cls._cache.move_to_end(key)
-                return inst
+                # `tref update` swaps the tree under long-lived daemons; a new meta.json means a new build.
+                if inst.meta_stamp == _file_stamp(index_dir / "meta.json"):
+                    cls._cache.move_to_end(key)
+                    cls._cache_stats["hits"] += 1
+                    return inst
+                del cls._cache[key]
+                cls._cache_bytes -= inst.approx_bytes
+                cls._cache_stats["reloads"] += 1
+            cls._cache_stats["misses"] += 1
             inst = cls(index_dir=index_dir, model_name=model_name)
             cls._cache[key] = inst
-            while len(cls._cache) > MAX_RETRIEVER_CACHE:
-                cls._cache.popitem(last=False)
+            cls._cache_bytes += inst.approx_bytes
+            cls._evict(keep=key)
             return inst
 
+    @classmethod
+    def _is_pinned(cls, inst: "Retriever") -> bool:
+        library, version = inst.index_dir.parent.name, inst.index_dir.name
+        return library in cls._pinned or f"{library}@{version}" in cls._pinned
+
+    @classmethod
+    def _evict(cls, keep: str | None = None) -> None:
+        # Least recently used first; pinned retrievers and the one just requested always stay.
+        for key in list(cls._cache):
+            if cls._cache_bytes <= cls._cache_max_bytes:
+                break
+            inst = cls._cache[key]
+            if key == keep or cls._is_pinned(inst):
+                continue
+            del cls._cache[key]
+            cls._cache_bytes -= inst.approx_bytes
+            cls._cache_stats["evictions"] += 1
+
+    @classmethod
+    def configure_cache(cls, max_mb: int | None = None, pinned: list[str] | None = None) -> None:
+        """Change the retriever cache budget and/or the pinned LIB or LIB@VER names at runtime."""
+        with cls._lock:
+            if max_mb is not None:
+                cls._cache_max_bytes = int(max_mb) * 1024 * 1024
+            if pinned is not None:
+                cls._pinned = set(pinned)
+            cls._evict()
+
+    @classmethod
+    def pin(cls, name: str) -> None:
+        with cls._lock:
+            cls._pinned.add(name)
+
+    @classmethod
+    def unpin(cls, name: str) -> None:
+        with cls._lock:
+            cls._pinned.discard(name)
+            cls._evict()
+
+    @classmethod
+    def cache_stats(cls) -> dict[str, object]:
+        with cls._lock:
+            return {
+                **cls._cache_stats,
+                "entries": len(cls._cache),
+                "bytes": cls._cache_bytes,
+                "max_bytes": cls._cache_max_bytes,
+                "pinned": sorted(cls._pinned),
+                "retrievers": [
+                    {"index_dir": key, "bytes": inst.approx_bytes, "pinned": cls._is_pinned(inst)}
+                    for key, inst in cls._cache.items()
+                ],
+            }
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop cached retrievers, merged indexes and query vectors; the loaded embedding model is kept."""
+        with cls._lock:
+            cls._cache.clear()
+            cls._cache_bytes = 0
+            cls._query_vector_cache.clear()
+        with cls._merged_lock:
+            cls._merged_indexes.clear()
+
+    @classmethod
+    def _merged_index(cls, merged_dir: Path) -> tuple[object, dict] | None:
+        import faiss
+
+        meta_path = merged_dir / "meta.json"
+        stamp = _file_stamp(meta_path)
+        if stamp is None:
+            return None
+        key = str(merged_dir)
+        with cls._merged_lock:
+            cached = cls._merged_indexes.get(key)
+            if cached is not None and cached[0] == stamp:
+                return cached[1], cached[2]
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                index = faiss.read_index(str(merged_dir / str(meta["index_file"])))
+            except Exception:
+                return None
+            cls._merged_indexes[key] = (stamp, index, meta)
+            return index, meta
+
+    def _merged_view(self) -> tuple[object, int, int, dict] | None:
+        merged = self._merged_index(self.index_dir.parent.parent / MERGED_INDEX_DIR)
+        if merged is None:
+            return None
+        index, meta = merged
+        entry = (meta.get("ranges") or {}).get(f"{self.index_dir.parent.name}/{self.index_dir.name}")
+        if (
+            not entry
+            or entry.get("build_hash") != self.index_meta.get("build_hash")
+            or meta.get("embedding_model") != self.index_meta.get("embedding_model")
+            or int(entry["end"]) - int(entry["start"]) != len(self.store)
+        ):
+            return None
+        return index, int(entry["start"]), int(entry["end"]), meta
+
+    def configure_search(self, ef_search: int | None = None, nprobe: int | None = None) -> None:
+        """Set search-time knobs for HNSW (efSearch) and IVF (nprobe) indexes."""
+        if ef_search is not None:
+            self.ef_search = int(ef_search)
+        if nprobe is not None:
+            self.nprobe = int(nprobe)
+
+    def _search_params(self, fetch_k: int):
+        import faiss
+
+        # Passed per call rather than set on the shared index, so concurrent searches don't race.
+        sel = self._id_selector
+        if isinstance(self.index, faiss.IndexHNSW):
+            ef = max(self.ef_search, fetch_k)
+            if sel is None:
+                return faiss.SearchParametersHNSW(efSearch=ef)
+            # A range filter discards most of the graph's candidates; widen the beam to compensate.
+            ef = min(ef * self._filter_ratio, max(ef, int(self.index.ntotal)))
+            return faiss.SearchParametersHNSW(efSearch=ef, sel=sel)
+        if isinstance(self.index, faiss.IndexIVF) and (self.nprobe or sel is not None):
+            nprobe = self.nprobe or int(self.index.nprobe)
+            if sel is None:
+                return faiss.SearchParametersIVF(nprobe=nprobe)
+            return faiss.SearchParametersIVF(nprobe=nprobe, sel=sel)
+        if sel is not None:
+            return faiss.SearchParameters(sel=sel)
+        return None
+
     def _section_boost(self, section: str, intent: str) -> float:
         sec = section.lower()
         if intent == "risk" and sec in {"gotchas / version notes", "warnings", "cautions"}:
@@ -151,84 +313,192 @@ class Retriever:
             return 0.06
         return 0.0
 
+    def _section_boosts(self, intent: str) -> np.ndarray:
+        boosts = self._section_boost_cache.get(intent)
+        if boosts is None:
+            boosts = np.array([self._section_boost(name, intent) for name in self.store.sections], dtype="float64")
+            self._section_boost_cache[intent] = boosts
+        return boosts
+
     def _hybrid_scores(
-        self, query: str, scores: np.ndarray, indices: np.ndarray, intent: str = "default"
+        self,
+        query: str,
+        scores: np.ndarray,
+        indices: np.ndarray,
+        intent: str = "default",
+        top_k: int | None = None,
     ) -> list[tuple[float, int]]:
+        valid = indices >= 0
+        cand = indices[valid].astype(np.int64)
+        if cand.size == 0:
+            return []
+        sem = scores[valid].astype("float64")
+
+        # Lexical overlap: gather each candidate's CSR token-id row and count query-token hits.
         q_tokens = _tokenize(query)
-        ranked: list[tuple[float, int]] = []
-        for sem_score, idx in zip(scores, indices, strict=False):
-            if idx < 0:
-                continue
-            doc = self.chunks[int(idx)]
-            d_tokens = doc["query_tokens"]
-            overlap = len(q_tokens & d_tokens) / max(1, len(q_tokens))
-            section_bonus = self._section_boost(str(doc.get("section", "")), intent)
-            # Intent-aware lightweight hybrid rank; semantic remains dominant.
-            hybrid = (0.78 * float(sem_score)) + (0.14 * float(overlap)) + (0.08 * float(section_bonus))
-            ranked.append((hybrid, int(idx)))
-        ranked.sort(key=lambda item: item[0], reverse=True)
-        return ranked
+        q_ids = self.store.token_ids_for(q_tokens)
+        starts = self.store.token_offsets[cand]
+        lengths = self.store.token_offsets[cand + 1] - starts
+        total = int(lengths.sum())
+        if q_ids.size and total:
+            row_of = np.repeat(np.arange(cand.size), lengths)
+            flat = np.arange(total) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+            hits = np.isin(self.store.token_ids[flat], q_ids)
+            counts = np.bincount(row_of, weights=hits, minlength=cand.size)
+        else:
+            counts = np.zeros(cand.size, dtype="float64")
+        overlap = counts / max(1, len(q_tokens))
+        section_bonus = self._section_boosts(intent)[self.store.section_id[cand]]
+
+        # Intent-aware lightweight hybrid rank; semantic remains dominant.
+        hybrid = (0.78 * sem) + (0.14 * overlap) + (0.08 * section_bonus)
+
+        order = np.arange(cand.size)
+        if top_k is not None and top_k < cand.size:
+            # Widen the argpartition cut to every candidate tied with the k-th score.
+            kth = hybrid[np.argpartition(-hybrid, top_k - 1)[:top_k]].min()
+            order = np.flatnonzero(hybrid >= kth)
+        # Stable descending order: ties keep FAISS rank, as the previous list sort did.
+        order = order[np.lexsort((order, -hybrid[order]))]
+        if top_k is not None:
+            order = order[:top_k]
+        return [(float(hybrid[i]), int(cand[i])) for i in order]
 
     @classmethod
     def _query_vector(cls, query: str) -> np.ndarray:
-        with cls._lock:
-            vec = cls._query_vector_cache.get(query)
-            if vec is not None:
-                cls._query_vector_cache.move_to_end(query)
-                return vec
+        return cls._query_vectors([query])
 
-        vector = np.array(list(cls._embedder.embed([query])), dtype="float32")
-        faiss.normalize_L2(vector)
+    @classmethod
+    def query_vector(cls, query: str) -> np.ndarray:
+        """Embed `query` before any index is loaded; later searches for the same text reuse the vector."""
+        return cls._query_vector(query)
 
-        with cls._lock:
-            cls._query_vector_cache[query] = vector
-            while len(cls._query_vector_cache) > MAX_QUERY_VECTOR_CACHE:
-                cls._query_vector_cache.popitem(last=False)
-        return vector
+    @classmethod
+    def query_embedding_cache(cls) -> EmbeddingCache:
+        """The persistent query-vector cache shared by every retriever in this process."""
+        return EmbeddingCache.shared(QUERY_CACHE_FILE, QUERY_CACHE_MAX_MB * 1024 * 1024)
 
-    def search(self, query: str, top_k: int = 5, intent: str | None = None) -> list[SearchResult]:
-        query_intent = intent or infer_query_intent(query)
-        vector = self._query_vector(query)
+    @classmethod
+    def _ensure_embedder(cls, model_name: str = EMBED_MODEL) -> TextEmbedding:
+        with cls._embedder_lock:
+            if cls._embedder is None:
+                cls._embedder = _build_embedder(model_name=model_name)
+            return cls._embedder
 
-        # Over-fetch for lexical reranking.
-        fetch_k = min(max(top_k * 4, top_k), len(self.chunks))
-        scores, indices = self.index.search(vector, fetch_k)
-        ranked = self._hybrid_scores(query, scores[0], indices[0], intent=query_intent)[:top_k]
+    @classmethod
+    def _query_vectors(cls, queries: list[str]) -> np.ndarray:
+        queries = [normalize_query(query) for query in queries]
+        found: dict[str, np.ndarray] = {}
+        with cls._lock:
+            for query in queries:
+                vec = cls._query_vector_cache.get(query)
+                if vec is not None:
+                    cls._query_vector_cache.move_to_end(query)
+                    found[query] = vec
+
+        # Embed every uncached query in one batch; duplicates are embedded once.
+        missing = list(dict.fromkeys(q for q in queries if q not in found))
+        if missing:
+            # The persistent query cache is consulted first, so the model is only loaded on a true miss.
+            matrix, _cached = embed_texts(_LazyEmbedder(cls), missing, EMBED_MODEL, cache=cls.query_embedding_cache())
+            with cls._lock:
+                for row, query in enumerate(missing):
+                    vec = matrix[row : row + 1].copy()
+                    found[query] = vec
+                    cls._query_vector_cache[query] = vec
+                while len(cls._query_vector_cache) > MAX_QUERY_VECTOR_CACHE:
+                    cls._query_vector_cache.popitem(last=False)
+        return np.vstack([found[q] for q in queries])
 
+    def _to_results(self, ranked: list[tuple[float, int]]) -> list[SearchResult]:
         out: list[SearchResult] = []
         for score, idx in ranked:
-            chunk = self.chunks[idx]
+            doc = self.store.doc(idx)
             out.append(
                 SearchResult(
                     score=float(score),
-                    text=chunk["text"],
-                    citation=chunk["citation"],
-                    library=chunk["library"],
-                    version=chunk["version"],
-                    item=chunk["item"],
-                    signature=chunk["signature"],
-                    section=chunk.get("section", ""),
-                    source_url=chunk.get("source_url"),
-                    source_title=chunk.get("source_title"),
+                    text=self.store.text(idx),
+                    citation=doc["citation"],
+                    library=doc["library"],
+                    version=doc["version"],
+                    item=self.store.item(idx),
+                    signature=doc["signature"],
+                    section=self.store.section(idx),
+                    source_url=doc.get("source_url"),
+                    source_title=doc.get("source_title"),
                 )
             )
         return out
 
+    def search(self, query: str, top_k: int = 5, intent: str | None = None) -> list[SearchResult]:
+        return self.search_many([query], top_k=top_k, intents=[intent])[0]
+
+    def search_many(
+        self, queries: list[str], top_k: int = 5, intents: list[str | None] | None = None
+    ) -> list[list[SearchResult]]:
+        if not queries:
+            return []
+        if intents is None:
+            intents = [None] * len(queries)
+        with stage("embed_query"):
+            vectors = self._query_vectors(queries)
+
+        # Over-fetch for lexical reranking; one FAISS call covers the whole batch.
+        fetch_k = min(max(top_k * 4, top_k), len(self.store))
+        params = self._search_params(fetch_k)
+        with stage("faiss_search"):
+            if params is None:
+                scores, indices = self.index.search(vectors, fetch_k)
+            else:
+                scores, indices = self.index.search(vectors, fetch_k, params=params)
+        if self.id_offset:
+            indices = np.where(indices >= 0, indices - self.id_offset, indices)
+
+        out: list[list[SearchResult]] = []
+        for row, query in enumerate(queries):
+            query_intent = intents[row] or infer_query_intent(query)
+            with stage("hybrid_rerank"):
+                ranked = self._hybrid_scores(query, scores[row], indices[row], intent=query_intent, top_k=top_k)
+            with stage("to_results"):
+                out.append(self._to_results(ranked))
+        return out
+
     def item_document(self, item: str) -> list[dict[str, str]]:
-        indices = self._item_to_indices.get(item, [])
         out: list[dict[str, str]] = []
-        for i in indices:
-            section = self.chunks[i]
+        for i in self.store.item_indices(item):
+            doc = self.store.doc(i)
             out.append(
                 {
-                    "section": section.get("section", ""),
-                    "text": _strip_chunk_scaffold(section.get("text", "")),
-                    "doc_url": section.get("source_url"),
-                    "doc_title": section.get("source_title"),
-                    "last_updated": section.get("source_last_updated"),
+                    "section": self.store.section(i),
+                    "text": _strip_chunk_scaffold(self.store.text(i)),
+                    "doc_url": doc.get("source_url"),
+                    "doc_title": doc.get("source_title"),
+                    "last_updated": doc.get("source_last_updated"),
                 }
             )
         return out
 
     def item_metadata(self, item: str) -> dict[str, object]:
-        return dict(self._item_metadata.get(item, {}))
+        doc = self.store.item_doc(item)
+        if doc is None:
+            return {}
+        return {
+            "library": doc.get("library"),
+            "version": doc.get("version"),
+            "item": item,
+            "signature": doc.get("signature"),
+            "alternatives": list(doc.get("alternatives") or []),
+            "source_url": doc.get("source_url"),
+            "source_title": doc.get("source_title"),
+            "source_last_updated": doc.get("source_last_updated"),
+        }
+
+
+class _LazyEmbedder:
+    """Stands in for the embedding model and loads it only when a text actually has to be embedded."""
+
+    def __init__(self, owner: type[Retriever]) -> None:
+        self._owner = owner
+
+    def embed(self, texts: list[str]):
+        return self._owner._ensure_embedder().embed(texts)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from tref.config import EMBED_MODEL, ROUTE_MIN_MARGIN, ROUTE_MIN_SIMILARITY
+
+CENTROIDS_FILE = "centroids.npy"
+
+
+def _stat_stamp(path: Path) -> tuple[int, int, int] | None:
+    # Inode and size too: release archives zero mtimes, so a swapped-in file can keep the old one.
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class LibraryRouter:
+    """Centroid vectors of every local library/version, stacked into one matrix.
+
+    A query embedding is scored against all of them with a single matrix
+    product; a library's score is its best centroid similarity.
+    """
+
+    _cache: dict[str, tuple[tuple[Any, ...], "LibraryRouter"]] = {}
+    _lock = threading.Lock()
+
+    def __init__(self, libraries: list[str], matrix: np.ndarray, labels: np.ndarray) -> None:
+        self.libraries = libraries
+        self.matrix = matrix
+        self.labels = labels
+
+    @classmethod
+    def load(cls, index_root: Path, model_name: str = EMBED_MODEL) -> "LibraryRouter":
+        # build-index rewrites _manifest.json and updates swap the whole tree, so these two cover both.
+        state = (_stat_stamp(index_root), _stat_stamp(index_root / "_manifest.json"), model_name)
+        key = str(index_root)
+        with cls._lock:
+            cached = cls._cache.get(key)
+            if cached is not None and cached[0] == state:
+                return cached[1]
+        router = cls._read(index_root, model_name)
+        with cls._lock:
+            cls._cache[key] = (state, router)
+        return router
+
+    @classmethod
+    def _read(cls, index_root: Path, model_name: str) -> "LibraryRouter":
+        libraries: list[str] = []
+        blocks: list[np.ndarray] = []
+        labels: list[int] = []
+        dim: int | None = None
+        library_dirs = sorted(p for p in index_root.iterdir() if p.is_dir()) if index_root.exists() else []
+        for library_dir in library_dirs:
+            for version_dir in sorted(p for p in library_dir.iterdir() if p.is_dir()):
+                try:
+                    meta = json.loads((version_dir / "meta.json").read_text(encoding="utf-8"))
+                    centroids = np.load(version_dir / CENTROIDS_FILE)
+                except (OSError, ValueError):
+                    continue
+                # Vectors from another embedding model are not comparable with the query.
+                if meta.get("embedding_model") != model_name or centroids.ndim != 2 or not len(centroids):
+                    continue
+                if dim is None:
+                    dim = int(centroids.shape[1])
+                if centroids.shape[1] != dim:
+                    continue
+                if library_dir.name not in libraries:
+                    libraries.append(library_dir.name)
+                blocks.append(centroids.astype("float32", copy=False))
+                labels.extend([libraries.index(library_dir.name)] * len(centroids))
+        matrix = np.vstack(blocks) if blocks else np.zeros((0, dim or 0), dtype="float32")
+        return cls(libraries, matrix, np.asarray(labels, dtype=np.int64))
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        with cls._lock:
+            cls._cache.clear()
+
+    def __bool__(self) -> bool:
+        return bool(self.libraries)
+
+    def candidates(self, vector: np.ndarray) -> list[dict[str, Any]]:
+        if not self.libraries or vector.shape[-1] != self.matrix.shape[1]:
+            return []
+        sims = self.matrix @ vector.reshape(-1)
+        best = np.full(len(self.libraries), -np.inf, dtype="float32")
+        np.maximum.at(best, self.labels, sims)
+        order = np.lexsort((np.arange(len(best)), -best))
+        return [{"library": self.libraries[i], "similarity": round(float(best[i]), 4)} for i in order]
+
+    def route(
+        self,
+        vector: np.ndarray,
+        min_similarity: float = ROUTE_MIN_SIMILARITY,
+        min_margin: float = ROUTE_MIN_MARGIN,
+    ) -> tuple[str | None, list[dict[str, Any]]]:
+        candidates = self.candidates(vector)
+        if not candidates:
+            return None, []
+        top = candidates[0]
+        second = candidates[1]["similarity"] if len(candidates) > 1 else -1.0
+        if top["similarity"] < min_similarity or (top["similarity"] - second) < min_margin:
+            return None, candidates[:3]
+        return top["library"], candidates[:3]
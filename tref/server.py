@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from tref.config import (
+    CUSTOM_INDEX_ROOT,
+    DEFAULT_HTTP_HOST,
+    DEFAULT_HTTP_MAX_PENDING,
+    DEFAULT_HTTP_PORT,
+    DEFAULT_HTTP_TIMEOUT_SECONDS,
+    DEFAULT_HTTP_WORKERS,
+    HTTP_ALLOW_LLM,
+    INDEX_ROOT,
+    get_remote_settings,
+)
+from tref.daemon import ASK_PARAMS
+from tref.errors import DetectionError, FreshnessError, TrefError, UpdateError, ValidationError
+from tref.updater import freshness_status
+
+MAX_BODY_BYTES = 1024 * 1024
+MAX_TOP_K = 20  # same bound as `tref query --top-k`
+BOOL_PARAMS = ("llm", "strict_fresh", "no_autodetect", "include_full_doc")
+STR_PARAMS = ("query", "library", "version", "llm_model", "freshness_policy", "preferred_language", "index_root")
+
+
+class _HTTPFailure(Exception):
+    def __init__(self, status: int, code: str, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+def _status_for_error(exc: Exception) -> int:
+    if isinstance(exc, DetectionError):
+        return 422
+    if isinstance(exc, FreshnessError):
+        return 404 if exc.code == "INDEX_NOT_FOUND" else 503
+    if isinstance(exc, UpdateError):
+        return 502
+    if isinstance(exc, (ValidationError, ValueError, TypeError)):
+        return 400
+    return 500
+
+
+def _validate_ask_params(body: dict[str, Any], allow_llm: bool = False) -> None:
+    unknown = sorted(set(body) - ASK_PARAMS)
+    if unknown:
+        raise _HTTPFailure(400, "INVALID_PARAMS", f"Unknown ask parameters: {unknown}")
+    # JSON lets "false" or 0 through where ask() expects a bool, and a truthy string would silently enable it.
+    for name in BOOL_PARAMS:
+        if body.get(name) is not None and not isinstance(body[name], bool):
+            raise _HTTPFailure(400, "INVALID_PARAMS", f"'{name}' must be a boolean")
+    for name in STR_PARAMS:
+        if body.get(name) is not None and not isinstance(body[name], str):
+            raise _HTTPFailure(400, "INVALID_PARAMS", f"'{name}' must be a string")
+    libraries = body.get("libraries")
+    if libraries is not None and (not isinstance(libraries, list) or not all(isinstance(x, str) for x in libraries)):
+        raise _HTTPFailure(400, "INVALID_PARAMS", "'libraries' must be a list of strings")
+    if not (body.get("query") or "").strip():
+        raise _HTTPFailure(400, "INVALID_PARAMS", "'query' is required")
+    if body.get("llm") and not allow_llm:
+        # Generation is slow and reaches the configured Ollama endpoint, so the local server opts in explicitly.
+        raise _HTTPFailure(403, "LLM_DISABLED", "LLM answers are disabled on this server; start it with --allow-llm")
+    top_k = body.get("top_k")
+    if top_k is not None and (isinstance(top_k, bool) or not isinstance(top_k, int) or not 1 <= top_k <= MAX_TOP_K):
+        raise _HTTPFailure(400, "INVALID_PARAMS", f"'top_k' must be an integer between 1 and {MAX_TOP_K}")
+    if body.get("index_root"):
+        # Any local client can reach the server, so it only reads the index trees tref itself manages.
+        root = Path(str(body["index_root"])).expanduser().resolve()
+        allowed = (INDEX_ROOT.resolve(), CUSTOM_INDEX_ROOT.resolve())
+        if not any(root == base or base in root.parents for base in allowed):
+            raise _HTTPFailure(
+                400, "INVALID_PARAMS", f"'index_root' must be inside {INDEX_ROOT} or {CUSTOM_INDEX_ROOT}"
+            )
+
+
+def _ask(params: dict[str, Any]) -> dict[str, Any]:
+    from tref.api import ask
+
+    # JSON null means "use the default", as if the parameter had been omitted.
+    params = {name: value for name, value in params.items() if value is not None}
+    if params.get("index_root"):
+        params["index_root"] = Path(str(params["index_root"]))
+    return ask(json_mode=True, **params)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_PooledHTTPServer"
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, exc: Exception) -> None:
+        if isinstance(exc, _HTTPFailure):
+            status, code, message = exc.status, exc.code, exc.message
+        elif isinstance(exc, TrefError):
+            status, code, message = _status_for_error(exc), exc.code, exc.message
+        else:
+            status, code, message = _status_for_error(exc), type(exc).__name__, str(exc)
+        self._send_json(status, {"error": {"code": code, "message": message}})
+
+    def _read_json_body(self) -> dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise _HTTPFailure(413, "REQUEST_TOO_LARGE", f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        raw = self.rfile.read(length) if length else b"{}"
+        try:
+            data = json.loads(raw or b"{}")
+        except json.JSONDecodeError as exc:
+            raise _HTTPFailure(400, "INVALID_JSON", f"Request body is not valid JSON: {exc}") from None
+        if not isinstance(data, dict):
+            raise _HTTPFailure(400, "INVALID_JSON", "Request body must be a JSON object")
+        return data
+
+    def do_GET(self) -> None:  # noqa: N802
+        path = urlsplit(self.path).path.rstrip("/")
+        try:
+            if path == "/status":
+                payload = self.server.run_bounded(
+                    lambda: {"freshness": freshness_status(), "remote": get_remote_settings()}
+                )
+            elif path == "/freshness":
+                payload = self.server.run_bounded(freshness_status)
+            elif path == "/stats":
+                from tref.retrieval import Retriever
+
+                payload = {"retriever_cache": Retriever.cache_stats()}
+            else:
+                raise _HTTPFailure(404, "NOT_FOUND", f"Unknown endpoint '{path or '/'}'")
+        except Exception as exc:
+            self._send_error(exc)
+            return
+        self._send_json(200, payload)
+
+    def do_POST(self) -> None:  # noqa: N802
+        path = urlsplit(self.path).path.rstrip("/")
+        try:
+            if path != "/ask":
+                raise _HTTPFailure(404, "NOT_FOUND", f"Unknown endpoint '{path or '/'}'")
+            body = self._read_json_body()
+            _validate_ask_params(body, allow_llm=self.server.allow_llm)
+            payload = self.server.run_bounded(lambda: _ask(dict(body)))
+        except Exception as exc:
+            self._send_error(exc)
+            return
+        self._send_json(200, payload)
+
+
+class _PooledHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        workers: int,
+        max_pending: int,
+        timeout: float,
+        allow_llm: bool = False,
+    ) -> None:
+        self.allow_llm = allow_llm
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tref-http")
+        # Admission control: at most `workers` running plus `max_pending` queued requests.
+        self.slots = threading.BoundedSemaphore(workers + max_pending)
+        self.request_timeout = timeout
+        super().__init__(address, _Handler)
+
+    def run_bounded(self, fn: Callable[[], Any]) -> Any:
+        if not self.slots.acquire(blocking=False):
+            raise _HTTPFailure(503, "SERVER_BUSY", "All workers are busy and the pending queue is full")
+        try:
+            future = self.pool.submit(fn)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _f: self.slots.release())
+        try:
+            return future.result(timeout=self.request_timeout)
+        except FutureTimeoutError:
+            raise _HTTPFailure(
+                504,
+                "REQUEST_TIMEOUT",
+                f"Request did not finish within {self.request_timeout}s",
+            ) from None
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def serve_http(
+    host: str = DEFAULT_HTTP_HOST,
+    port: int = DEFAULT_HTTP_PORT,
+    workers: int = DEFAULT_HTTP_WORKERS,
+    max_pending: int = DEFAULT_HTTP_MAX_PENDING,
+    timeout: float = DEFAULT_HTTP_TIMEOUT_SECONDS,
+    allow_llm: bool = HTTP_ALLOW_LLM,
+) -> None:
+    # Load faiss/fastembed before accepting traffic. Both release the GIL inside
+    # index.search and ONNX inference, so pool workers overlap on native code
+    # while sharing the single class-level Retriever embedder.
+    import tref.api  # noqa: F401
+
+    server = _PooledHTTPServer(
+        (host, port), workers=max(1, workers), max_pending=max(0, max_pending), timeout=timeout, allow_llm=allow_llm
+    )
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import sqlite3
+
+
+def install_byte_counter(conn: sqlite3.Connection, table: str, column: str) -> None:
+    """Keep SUM(LENGTH(column)) of `table` in a `cache_meta` row, maintained by triggers.
+
+    Eviction then reads one row instead of scanning the table on every insert.
+    The counter is seeded with a single scan the first time an existing file is
+    opened; since every writer goes through SQLite, it stays exact across processes.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_bytes_insert AFTER INSERT ON {table} BEGIN "
+            f"UPDATE cache_meta SET value = value + LENGTH(NEW.{column}) WHERE key = '{table}_bytes'; END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_bytes_delete AFTER DELETE ON {table} BEGIN "
+            f"UPDATE cache_meta SET value = value - LENGTH(OLD.{column}) WHERE key = '{table}_bytes'; END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_bytes_update AFTER UPDATE OF {column} ON {table} BEGIN "
+            f"UPDATE cache_meta SET value = value - LENGTH(OLD.{column}) + LENGTH(NEW.{column}) "
+            f"WHERE key = '{table}_bytes'; END"
+        )
+        conn.execute(
+            f"INSERT OR IGNORE INTO cache_meta SELECT '{table}_bytes', COALESCE(SUM(LENGTH({column})), 0) FROM {table}"
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def stored_bytes(conn: sqlite3.Connection, table: str) -> int:
+    row = conn.execute("SELECT value FROM cache_meta WHERE key = ?", (f"{table}_bytes",)).fetchone()
+    return int(row[0]) if row else 0
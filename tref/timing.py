@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+_NULL_STAGE = nullcontext()
+_current: ContextVar["StageTimer | None"] = ContextVar("tref_stage_timer", default=None)
+
+
+class StageTimer:
+    """Accumulates exclusive wall time per named pipeline stage.
+
+    Stages may nest (e.g. `load_manifest` inside `resolve_version`); a parent
+    is only charged for time not spent in its children, so the per-stage
+    totals add up to the instrumented share of the request.
+    """
+
+    def __init__(self) -> None:
+        self.totals: dict[str, float] = {}
+        self._stack: list[list[Any]] = []
+
+    def _enter(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self) -> None:
+        name, start, child = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.totals[name] = self.totals.get(name, 0.0) + (elapsed - child)
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def as_ms(self) -> dict[str, float]:
+        return {name: seconds * 1000 for name, seconds in self.totals.items()}
+
+
+class _Stage:
+    __slots__ = ("_timer", "_name")
+
+    def __init__(self, timer: StageTimer, name: str) -> None:
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self) -> None:
+        self._timer._enter(self._name)
+
+    def __exit__(self, *exc: Any) -> None:
+        self._timer._exit()
+
+
+def stage(name: str) -> Any:
+    """Time a block as stage `name` when a `collect_stages()` scope is active; otherwise a no-op."""
+    timer = _current.get()
+    if timer is None:
+        return _NULL_STAGE
+    return _Stage(timer, name)
+
+
+@contextmanager
+def collect_stages() -> Iterator[StageTimer]:
+    timer = StageTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
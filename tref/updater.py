@@ -1,39 +1,60 @@
 from __future__ import annotations
 
+import gzip
 import hashlib
 import json
 import os
+import re
 import shutil
 import subprocess
+import sys
 import tarfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
-import httpx
-
 from tref.config import (
+    BACKGROUND_REFRESH,
     COSIGN_BIN,
     COSIGN_KEY_PATH,
+    DELTA_UPDATES,
+    FRESHNESS_TTL_SECONDS,
     HTTP_MAX_RETRIES,
     HTTP_RETRY_BACKOFF_SECONDS,
     HTTP_TIMEOUT_SECONDS,
     INDEX_ROOT,
     MAX_DOWNLOAD_BYTES,
     MAX_INDEX_AGE_DAYS,
+    REFRESH_LOCK_FILE,
     REQUIRE_SIGNATURE,
+    SUBSCRIPTIONS,
+    UPDATE_LOCK_FILE,
+    UPDATE_LOCK_WAIT_SECONDS,
     UPDATE_STATE_CACHE,
     UPDATE_STRICT_VERIFY,
     ensure_dirs,
+    get_release_artifacts_asset_name,
     get_release_asset_name,
     get_release_checksum_asset_name,
     get_release_signature_asset_name,
     get_releases_api_url,
 )
 from tref.errors import FreshnessError, UpdateError
+from tref.locking import file_lock
+
+# A failed background refresh (e.g. offline) is not retried by queries for this long.
+REFRESH_RETRY_SECONDS = 300.0
+ARTIFACTS_FORMAT = 1
+ROOT_ARTIFACT = "_root"
+DELTA_DOWNLOAD_WORKERS = 8
+# "library/version", or a top-level build output such as "_merged".
+_ARTIFACT_KEY_RE = re.compile(r"^(?:_[A-Za-z0-9_.+-]+|[A-Za-z0-9_.+-]+/[A-Za-z0-9_.+-]+)$")
 
 
 def _http_get_json(url: str) -> dict:
+    import httpx
+
     last_error: Exception | None = None
     for attempt in range(HTTP_MAX_RETRIES):
         try:
@@ -82,9 +103,34 @@ def _write_update_state(state: dict) -> None:
     tmp = UPDATE_STATE_CACHE.with_suffix(".json.tmp")
     tmp.write_text(json.dumps(state, indent=2), encoding="utf-8")
     tmp.replace(UPDATE_STATE_CACHE)
+    _FRESHNESS_SNAPSHOTS.clear()
+
+
+# max_age_days -> (monotonic time computed, update-state mtime, status). The TTL bounds how
+# stale the age fields may get; the mtime check picks up updates from other processes.
+_FRESHNESS_SNAPSHOTS: dict[int, tuple[float, int | None, dict]] = {}
+
+
+def _state_mtime_ns() -> int | None:
+    try:
+        return UPDATE_STATE_CACHE.stat().st_mtime_ns
+    except OSError:
+        return None
 
 
 def freshness_status(max_age_days: int = MAX_INDEX_AGE_DAYS) -> dict:
+    """Freshness of the local snapshot, shared by every caller in the process for FRESHNESS_TTL_SECONDS."""
+    mtime = _state_mtime_ns()
+    now = time.monotonic()
+    cached = _FRESHNESS_SNAPSHOTS.get(max_age_days)
+    if cached is not None and cached[1] == mtime and (now - cached[0]) < FRESHNESS_TTL_SECONDS:
+        return dict(cached[2])
+    status = _compute_freshness_status(max_age_days)
+    _FRESHNESS_SNAPSHOTS[max_age_days] = (now, mtime, status)
+    return dict(status)
+
+
+def _compute_freshness_status(max_age_days: int) -> dict:
     state = _read_update_state()
     fetched_at = state.get("fetched_at")
     if not fetched_at:
@@ -140,6 +186,8 @@ def freshness_status(max_age_days: int = MAX_INDEX_AGE_DAYS) -> dict:
 
 
 def _download_file(url: str, target_path: Path) -> int:
+    import httpx
+
     total = 0
     with httpx.stream(
         "GET",
@@ -203,11 +251,15 @@ def _discover_stage_root(stage_dir: Path) -> Path:
 
 def _atomic_replace_index_tree(stage_root: Path) -> None:
     ensure_dirs()
-    backup_root = INDEX_ROOT.parent / f"{INDEX_ROOT.name}.backup"
     temp_new_root = INDEX_ROOT.parent / f"{INDEX_ROOT.name}.new"
 
     shutil.rmtree(temp_new_root, ignore_errors=True)
     shutil.copytree(stage_root, temp_new_root)
+    _swap_index_tree(temp_new_root)
+
+
+def _swap_index_tree(temp_new_root: Path) -> None:
+    backup_root = INDEX_ROOT.parent / f"{INDEX_ROOT.name}.backup"
 
     # Backup current indexes for rollback.
     if INDEX_ROOT.exists():
@@ -225,10 +277,61 @@ def _atomic_replace_index_tree(stage_root: Path) -> None:
         shutil.rmtree(temp_new_root, ignore_errors=True)
 
 
-def update_indexes(silent: bool = False, strict_verify: bool = UPDATE_STRICT_VERIFY) -> Path:
+def _clear_response_cache() -> None:
+    # Cached responses are keyed by build_hash, so stale ones can never be served; this reclaims their space.
+    from tref.responsecache import ResponseCache
+
+    ResponseCache.shared().clear()
+
+
+def update_indexes(
+    silent: bool = False,
+    strict_verify: bool = UPDATE_STRICT_VERIFY,
+    wait_seconds: float = UPDATE_LOCK_WAIT_SECONDS,
+    only: list[str] | None = None,
+) -> Path:
+    """Download, verify and swap in the latest release, one process at a time.
+
+    Concurrent callers wait up to `wait_seconds` for the running update; if it
+    succeeds they return without downloading again (single-flight), otherwise
+    they raise UPDATE_IN_PROGRESS and keep the current snapshot. `only` (default:
+    the configured subscriptions) limits the download to those LIB / LIB@VER
+    entries; other local directories are kept as they are.
+    """
+    selection = list(only) if only is not None else list(SUBSCRIPTIONS)
     ensure_dirs()
+    state_before = _state_mtime_ns()
+    with file_lock(UPDATE_LOCK_FILE, timeout=wait_seconds) as acquired:
+        if not acquired:
+            raise UpdateError("UPDATE_IN_PROGRESS", f"Another process is updating {INDEX_ROOT}")
+        # The state file only changes when an update completes, so a change means we waited on one;
+        # reuse it only if it fetched at least what this call asked for.
+        if _state_mtime_ns() != state_before and _selection_covers(_read_update_state().get("only") or [], selection):
+            if not silent:
+                print(f"Indexes in {INDEX_ROOT} were updated by another process")
+            return INDEX_ROOT
+        return _update_indexes_locked(silent, strict_verify, selection)
+
+
+def _selection_covers(done: list[str], wanted: list[str]) -> bool:
+    if not done:
+        return True
+    if not wanted:
+        return False
+    return all(name in done or name.split("@", 1)[0] in done for name in wanted)
+
+
+def _update_indexes_locked(silent: bool, strict_verify: bool, selection: list[str]) -> Path:
     releases_api = get_releases_api_url()
     release = _http_get_json(releases_api)
+    has_artifacts = _find_asset_url(release, get_release_artifacts_asset_name()) is not None
+    if selection and not has_artifacts:
+        raise UpdateError(
+            "UPDATE_ARTIFACTS_MISSING",
+            f"Selective install needs per-library artifacts, but '{get_release_artifacts_asset_name()}' was not found",
+        )
+    if selection or (DELTA_UPDATES and has_artifacts):
+        return _delta_update(release, releases_api, silent, strict_verify, selection)
 
     archive_name = get_release_asset_name()
     checksum_name = get_release_checksum_asset_name()
@@ -300,6 +403,7 @@ def update_indexes(silent: bool = False, strict_verify: bool = UPDATE_STRICT_VER
         _safe_extract_tar(archive_path, stage_dir)
         stage_root = _discover_stage_root(stage_dir)
         _atomic_replace_index_tree(stage_root)
+        _clear_response_cache()
     finally:
         shutil.rmtree(stage_dir, ignore_errors=True)
         archive_path.unlink(missing_ok=True)
@@ -329,6 +433,284 @@ def update_indexes(silent: bool = False, strict_verify: bool = UPDATE_STRICT_VER
     return INDEX_ROOT
 
 
+def artifact_asset_name(key: str) -> str:
+    return f"tref-idx-{key.replace('/', '__')}.tar.gz"
+
+
+def _write_tar(target: Path, base: Path, files: list[Path]) -> None:
+    # Zeroed timestamps and owners keep an unchanged directory's archive byte-identical across releases.
+    with target.open("wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as gz:
+        with tarfile.open(fileobj=gz, mode="w") as tf:
+            for path in files:
+                info = tf.gettarinfo(str(path), arcname=path.relative_to(base).as_posix())
+                info.mtime = 0
+                info.uid = info.gid = 0
+                info.uname = info.gname = ""
+                with path.open("rb") as fh:
+                    tf.addfile(info, fh)
+
+
+def write_release_artifacts(index_root: Path, output_dir: Path) -> dict:
+    """Write the release assets for `index_root`: the full archive plus per-library/version artifacts.
+
+    The artifact manifest records each directory's `build_hash`, sha256 and
+    size so `update_indexes` can fetch only the directories that changed.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    artifacts: dict[str, dict] = {}
+
+    def add(key: str, base: Path, files: list[Path], build_hash: str | None = None) -> None:
+        name = artifact_asset_name(key)
+        _write_tar(output_dir / name, base, files)
+        entry = {"asset": name, "sha256": _sha256_file(output_dir / name), "size": (output_dir / name).stat().st_size}
+        if build_hash:
+            entry["build_hash"] = build_hash
+        artifacts[key] = entry
+
+    add(ROOT_ARTIFACT, index_root, sorted(p for p in index_root.iterdir() if p.is_file()))
+    # Top-level build outputs (the merged index) ship as artifacts of their own.
+    for tree_dir in sorted(p for p in index_root.iterdir() if p.is_dir() and p.name.startswith("_")):
+        if tree_dir.name != ROOT_ARTIFACT and (tree_dir / "meta.json").exists():
+            files = sorted(p for p in tree_dir.rglob("*") if p.is_file())
+            add(tree_dir.name, tree_dir, files, _dir_build_hash(tree_dir))
+    for library_dir in sorted(p for p in index_root.iterdir() if p.is_dir() and not p.name.startswith("_")):
+        for version_dir in sorted(p for p in library_dir.iterdir() if p.is_dir()):
+            meta = json.loads((version_dir / "meta.json").read_text(encoding="utf-8"))
+            files = sorted(p for p in version_dir.rglob("*") if p.is_file())
+            add(f"{library_dir.name}/{version_dir.name}", version_dir, files, meta.get("build_hash"))
+
+    for name, payload in (
+        (get_release_artifacts_asset_name(), {"format": ARTIFACTS_FORMAT, "artifacts": artifacts}),
+        (get_release_asset_name(), None),
+    ):
+        path = output_dir / name
+        if payload is None:
+            _write_tar(path, index_root, sorted(p for p in index_root.rglob("*") if p.is_file()))
+        else:
+            path.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
+        checksum_name = get_release_checksum_asset_name() if payload is None else f"{name}.sha256"
+        (output_dir / checksum_name).write_text(f"{_sha256_file(path)}  {name}\n", encoding="utf-8")
+    return {"artifacts": len(artifacts) - 1, "output": str(output_dir)}
+
+
+def _dir_build_hash(directory: Path) -> str | None:
+    # Merged indexes from before build_hash was recorded are identified by their meta.json contents.
+    try:
+        raw = (directory / "meta.json").read_bytes()
+        return json.loads(raw).get("build_hash") or hashlib.sha256(raw).hexdigest()
+    except (OSError, ValueError):
+        return None
+
+
+def _local_build_hash(key: str) -> str | None:
+    return _dir_build_hash(INDEX_ROOT / key)
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    # Index files are never rewritten in place, so the old and new trees can share inodes.
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _fetch_artifact(release: dict, entry: dict, target: Path) -> int:
+    url = _find_asset_url(release, str(entry.get("asset")))
+    if not url:
+        raise UpdateError("UPDATE_ASSET_NOT_FOUND", f"Release asset '{entry.get('asset')}' not found")
+    size = _download_file(url, target)
+    if size != int(entry.get("size", -1)) or _sha256_file(target) != str(entry.get("sha256", "")).lower():
+        raise UpdateError("UPDATE_ARTIFACT_MISMATCH", f"Artifact '{entry['asset']}' failed size/sha256 verification")
+    return size
+
+
+def _selected(library: str, version: str, selection: list[str]) -> bool:
+    return not selection or library in selection or f"{library}@{version}" in selection
+
+
+def _delta_update(release: dict, releases_api: str, silent: bool, strict_verify: bool, selection: list[str]) -> Path:
+    manifest_name = get_release_artifacts_asset_name()
+    checksum_url = _find_asset_url(release, f"{manifest_name}.sha256")
+    signature_url = _find_asset_url(release, f"{manifest_name}.sig")
+    if strict_verify and not checksum_url:
+        raise UpdateError(
+            "UPDATE_CHECKSUM_MISSING",
+            f"Strict verification enabled but checksum asset '{manifest_name}.sha256' was not found",
+        )
+    if REQUIRE_SIGNATURE and not signature_url:
+        raise UpdateError("UPDATE_SIGNATURE_MISSING", f"Signature is required but asset '{manifest_name}.sig' was not found")
+
+    stage_dir = INDEX_ROOT.parent / ".tref-delta-stage"
+    new_root = INDEX_ROOT.parent / f"{INDEX_ROOT.name}.new"
+    shutil.rmtree(stage_dir, ignore_errors=True)
+    stage_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        # The manifest is verified like the full archive; it then vouches for every artifact's sha256.
+        manifest_path = stage_dir / manifest_name
+        _download_file(str(_find_asset_url(release, manifest_name)), manifest_path)
+        actual_sha = _sha256_file(manifest_path)
+        expected_sha = None
+        verified = verified_signature = False
+        if checksum_url:
+            _download_file(checksum_url, stage_dir / "manifest.sha256")
+            expected_sha = _read_checksum_file(stage_dir / "manifest.sha256")
+            verified = actual_sha == expected_sha
+        if signature_url:
+            _download_file(signature_url, stage_dir / "manifest.sig")
+            verified_signature = _verify_signature_with_cosign(manifest_path, stage_dir / "manifest.sig")
+        if strict_verify and not verified:
+            raise UpdateError("UPDATE_CHECKSUM_MISMATCH", "Artifact manifest checksum verification failed")
+        if strict_verify and COSIGN_KEY_PATH and not verified_signature:
+            raise UpdateError("UPDATE_SIGNATURE_FAILED", "Artifact manifest signature verification failed")
+        if REQUIRE_SIGNATURE and not verified_signature:
+            raise UpdateError("UPDATE_SIGNATURE_REQUIRED", "Signature verification is required but failed/missing")
+
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        artifacts = manifest.get("artifacts") or {}
+        if manifest.get("format") != ARTIFACTS_FORMAT or ROOT_ARTIFACT not in artifacts:
+            raise UpdateError("UPDATE_INVALID_ARCHIVE", f"Unsupported artifact manifest format: {manifest.get('format')}")
+        keys = [key for key in artifacts if key != ROOT_ARTIFACT]
+        bad = [key for key in keys if not _ARTIFACT_KEY_RE.match(key) or key.startswith(".") or "/." in key]
+        if bad:
+            raise UpdateError("UPDATE_UNSAFE_ARCHIVE", f"Unsafe artifact keys blocked: {bad}")
+        library_keys = [key for key in keys if "/" in key]
+        # A merged index spans every library, so selective installs leave it out.
+        wanted = [key for key in library_keys if _selected(*key.split("/", 1), selection)]
+        if not selection:
+            wanted += [key for key in keys if "/" not in key]
+        unknown = [name for name in selection if not any(_selected(*key.split("/", 1), [name]) for key in library_keys)]
+        if unknown:
+            raise UpdateError("UPDATE_UNKNOWN_LIBRARY", f"Not in the release: {', '.join(unknown)}")
+        changed = [
+            key
+            for key in wanted
+            if not artifacts[key].get("build_hash") or artifacts[key]["build_hash"] != _local_build_hash(key)
+        ]
+        fetch = [ROOT_ARTIFACT, *changed]
+        with ThreadPoolExecutor(max_workers=min(DELTA_DOWNLOAD_WORKERS, len(fetch))) as pool:
+            sizes = list(
+                pool.map(lambda key: _fetch_artifact(release, artifacts[key], stage_dir / artifacts[key]["asset"]), fetch)
+            )
+
+        shutil.rmtree(new_root, ignore_errors=True)
+        new_root.mkdir(parents=True)
+        for key in fetch:
+            target = new_root if key == ROOT_ARTIFACT else new_root / key
+            target.mkdir(parents=True, exist_ok=True)
+            _safe_extract_tar(stage_dir / artifacts[key]["asset"], target)
+            if key != ROOT_ARTIFACT and artifacts[key].get("build_hash"):
+                if _dir_build_hash(target) != artifacts[key]["build_hash"]:
+                    raise UpdateError("UPDATE_ARTIFACT_MISMATCH", f"Artifact for {key} has an unexpected build_hash")
+        # Unchanged directories, and any already-installed ones outside the selection, are kept as they are.
+        for key in keys:
+            if key not in changed and (INDEX_ROOT / key).is_dir():
+                shutil.copytree(INDEX_ROOT / key, new_root / key, copy_function=_link_or_copy)
+        # Local-only extras carry over; a merged index kept by a selective install serves only its still-matching ranges.
+        if INDEX_ROOT.exists():
+            for extra in INDEX_ROOT.iterdir():
+                if extra.is_dir() and extra.name.startswith("_") and not (new_root / extra.name).exists():
+                    shutil.copytree(extra, new_root / extra.name, copy_function=_link_or_copy)
+        _discover_stage_root(new_root)
+        _swap_index_tree(new_root)
+        _clear_response_cache()
+    finally:
+        shutil.rmtree(stage_dir, ignore_errors=True)
+        shutil.rmtree(new_root, ignore_errors=True)
+
+    delta = {
+        "downloaded": len(changed),
+        "unchanged": len(wanted) - len(changed),
+        "skipped": len(keys) - len(wanted),
+        "bytes": sum(sizes),
+    }
+    _write_update_state(
+        {
+            "fetched_at": datetime.now(tz=UTC).isoformat(),
+            "release_tag": release.get("tag_name"),
+            "release_asset_name": manifest_name,
+            "release_asset_url": _find_asset_url(release, manifest_name),
+            "release_published_at": release.get("published_at"),
+            "verified": verified,
+            "verified_signature": verified_signature,
+            "sha256": actual_sha,
+            "expected_sha256": expected_sha,
+            "strict_verify": strict_verify,
+            "require_signature": REQUIRE_SIGNATURE,
+            "releases_api": releases_api,
+            "delta": delta,
+            "only": selection,
+        }
+    )
+    if not silent:
+        print(
+            f"Updated indexes in {INDEX_ROOT}: {delta['downloaded']} changed, {delta['unchanged']} unchanged, "
+            f"{delta['skipped']} not selected, "
+            f"{delta['bytes']} bytes (verified={verified}, signature={verified_signature})"
+        )
+    return INDEX_ROOT
+
+
+def _has_local_snapshot() -> bool:
+    return (INDEX_ROOT / "_manifest.json").exists()
+
+
+def refresh_in_background() -> bool:
+    """Start a detached process that runs `update_indexes`, unless one is running or was started recently.
+
+    The refresh lock's mtime records the last attempt; the spawned process
+    holds the lock for the whole update, so at most one refresher runs per
+    TREF_HOME across all processes.
+    """
+    try:
+        if time.time() - REFRESH_LOCK_FILE.stat().st_mtime < REFRESH_RETRY_SECONDS:
+            return False
+    except OSError:
+        pass
+    with file_lock(REFRESH_LOCK_FILE) as acquired:
+        if not acquired:
+            return False
+        os.utime(REFRESH_LOCK_FILE)
+    try:
+        subprocess.Popen(
+            [sys.executable, "-m", "tref.updater"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+            close_fds=True,
+        )
+    except OSError:
+        return False
+    return True
+
+
+def _run_background_refresh() -> int:
+    with file_lock(REFRESH_LOCK_FILE) as acquired:
+        if not acquired:
+            return 0
+        try:
+            update_indexes(silent=True, strict_verify=UPDATE_STRICT_VERIFY)
+        except Exception:
+            return 1
+    return 0
+
+
+def _refresh(inline: bool, strict_fresh: bool, status: dict | None = None) -> None:
+    if not inline:
+        refresh_in_background()
+        return
+    # With a snapshot to fall back on, a non-strict caller does not queue behind another process's update.
+    wait_seconds = UPDATE_LOCK_WAIT_SECONDS if strict_fresh or not _has_local_snapshot() else 0.0
+    try:
+        update_indexes(silent=True, strict_verify=UPDATE_STRICT_VERIFY, wait_seconds=wait_seconds)
+    except Exception:
+        if strict_fresh:
+            raise FreshnessError(
+                "FRESHNESS_STALE",
+                f"Indexes are stale/unverified ({status}). Update failed in strict mode.",
+            ) from None
+
+
 def ensure_index_exists(
     library: str,
     version: str,
@@ -337,27 +719,23 @@ def ensure_index_exists(
     strict_fresh: bool = False,
 ) -> Path:
     candidate = index_root / library / version
-    if ensure_fresh and index_root == INDEX_ROOT:
+    # Libraries outside the subscription list are served if present but never fetched implicitly.
+    subscribed = _selected(library, version, SUBSCRIPTIONS)
+    managed = ensure_fresh and index_root == INDEX_ROOT and subscribed
+    # Stale-while-revalidate: unless the caller demands freshness or there is nothing local to serve,
+    # answer from the current snapshot and let a background process fetch the next one.
+    inline = strict_fresh or not BACKGROUND_REFRESH or not (managed and _has_local_snapshot())
+    if managed:
         status = freshness_status()
         untrusted = not status.get("trusted", False)
         if (not status.get("fresh", False)) or (UPDATE_STRICT_VERIFY and untrusted):
-            try:
-                update_indexes(silent=True, strict_verify=UPDATE_STRICT_VERIFY)
-            except Exception:
-                if strict_fresh:
-                    raise FreshnessError(
-                        "FRESHNESS_STALE",
-                        f"Indexes are stale/unverified ({status}). Update failed in strict mode.",
-                    ) from None
+            _refresh(inline, strict_fresh, status)
 
     if candidate.exists():
         return candidate
 
-    if ensure_fresh and index_root == INDEX_ROOT:
-        try:
-            update_indexes(silent=True, strict_verify=UPDATE_STRICT_VERIFY)
-        except Exception:
-            pass
+    if managed:
+        _refresh(inline, strict_fresh=False)
 
     fallback = index_root / library / "latest"
     if candidate.exists():
@@ -365,7 +743,17 @@ def ensure_index_exists(
     if version != "latest" and fallback.exists():
         return fallback
 
+    if not subscribed and index_root == INDEX_ROOT:
+        raise FreshnessError(
+            "INDEX_NOT_FOUND",
+            f"No local index for {library}@{version}, and it is not in the subscription list. "
+            f"Run 'tref update --only {library}' or add it with 'tref config set --subscriptions'.",
+        )
     raise FreshnessError(
         "INDEX_NOT_FOUND",
         f"No local index for {library}@{version}. Run 'tref update' or build a custom index.",
     )
+
+
+if __name__ == "__main__":
+    sys.exit(_run_background_refresh())